@@ -1,15 +1,32 @@
 
 import streamlit as st
 import pandas as pd
-import time
 import os
-import sqlite3
-from http.server import SimpleHTTPRequestHandler, HTTPServer
-import threading
+import time
+import uuid
+from export_server import start_export_server
+from sale_api import API_HOST, start_sale_api
+from auction_db import WriteConflict
+from auction_state import AuctionState
+from bidding import BiddingEngine, BidRejected, next_bid
+from bulk_import import read_players_csv
+from storage import open_storage
+from dashboard_view import build_dashboard_view
+from render_timing import RerunTimer, TimingLog, start_profile, stop_leftover_profile, profile_report
 
 # Set up the Streamlit page (must be the first command)
 st.set_page_config(layout="wide")  # Use the full width of the screen
 
+# Time this rerun section by section; the admin sees the results in the Render Timings panel
+rerun_timer = RerunTimer()
+rerun_timer.section("Setup")
+
+# Profile the whole rerun with cProfile when the admin asked for it on the previous one. A
+# profiled rerun cut short (e.g. st.rerun as a lot closes) never reaches profile_report at
+# the bottom, so first stop any profiler it left running on this thread.
+stop_leftover_profile()
+profiler = start_profile() if st.session_state.pop("profile_next_rerun", False) else None
+
 # Hide Streamlit menu, footer, and prevent code inspection
 st.markdown("""
     <style>
@@ -118,260 +135,254 @@ st.markdown(
         0% { transform: translateX(0%); }
         100% { transform: translateX(-100%); }
     }
-    /* Popup CSS */
-    .popup {
-        position: fixed;
-        top: 20px;
-        right: 20px;
-        background-color: #4CAF50;
-        color: white;
-        padding: 15px;
-        border-radius: 5px;
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-        z-index: 1000;
-        animation: fadeInOut 3s ease-in-out;
-    }
-    @keyframes fadeInOut {
-        0% { opacity: 0; }
-        10% { opacity: 1; }
-        90% { opacity: 1; }
-        100% { opacity: 0; }
-    }
     </style>
     """,
     unsafe_allow_html=True,
 )
 
-# Database setup
-def init_db():
-    conn = sqlite3.connect("auction.db")
-    c = conn.cursor()
-    # Create tables if they don't exist
-    c.execute(
-        """CREATE TABLE IF NOT EXISTS players (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            sold_amount INTEGER,
-            rating INTEGER,
-            team_bought TEXT,
-            category TEXT,
-            nationality TEXT
-        )"""
-    )
-    c.execute(
-        """CREATE TABLE IF NOT EXISTS teams (
-            team TEXT PRIMARY KEY,
-            budget INTEGER
-        )"""
-    )
-    conn.commit()
-    return conn
-
-# Initialize database connection
-conn = init_db()
-
-# Function to load team data from the database
-def load_teams_from_db():
-    return pd.read_sql("SELECT * FROM teams", conn)
-
-# Function to save team data to the database
-def save_teams_to_db(teams_df):
-    teams_df.to_sql("teams", conn, if_exists="replace", index=False)
-
-# Function to load player data from the database
-def load_players_from_db():
-    return pd.read_sql("SELECT * FROM players", conn)
-
-# Function to save player data to the database
-def save_players_to_db(players_df):
-    players_df.to_sql("players", conn, if_exists="replace", index=False)
-
-# Initialize session state
-if "players" not in st.session_state:
-    st.session_state["players"] = load_players_from_db()
-
-if "teams" not in st.session_state:
-    st.session_state["teams"] = load_teams_from_db()
-
-if "team_budgets" not in st.session_state:
-    # Initialize team budgets from the teams DataFrame
-    st.session_state["team_budgets"] = dict(zip(st.session_state["teams"]["team"], st.session_state["teams"]["budget"]))
-
-if "team_squads" not in st.session_state:
-    # Initialize team squads
-    st.session_state["team_squads"] = {team: [] for team in st.session_state["team_budgets"].keys()}
-    for team in st.session_state["team_budgets"].keys():
-        squad = []
-        team_players = st.session_state["players"][st.session_state["players"]["team_bought"] == team]
-        for _, player in team_players.iterrows():
-            squad.append({
-                "id": player["id"],
-                "name": player["name"],
-                "sold_amount": player["sold_amount"],
-                "rating": player["rating"],
-                "category": player["category"],
-                "nationality": player["nationality"],
-            })
-        st.session_state["team_squads"][team] = squad
-
-# Function to generate a unique ID for each player
-def generate_unique_id():
-    if st.session_state["players"].empty:
-        return 1
-    else:
-        return st.session_state["players"]["id"].max() + 1
+# Shared auction state: one instance per process, so every browser session reads the
+# same snapshot instead of loading and holding its own copy of the tables.
+# Stored in auction.db unless AUCTION_STORAGE picks another backend (file or memory, see storage.py).
+@st.cache_resource
+def get_auction_state():
+    return AuctionState(open_storage(os.environ.get("AUCTION_STORAGE", "sqlite")))
+
+auction_state = get_auction_state()
+
+# Live bidding on the current lot, shared by every session like the auction state
+@st.cache_resource
+def get_bidding_engine():
+    return BiddingEngine(auction_state)
+
+bidding_engine = get_bidding_engine()
+
+# Finished reruns of every session, for the Render Timings panel
+@st.cache_resource
+def get_timing_log():
+    return TimingLog()
 
-# Function to calculate total team rating
+timing_log = get_timing_log()
+
+# Snapshots are never modified in place, so sessions just take a reference to the latest one
+snapshot = auction_state.snapshot
+
+# Function to get total team rating (maintained incrementally in the snapshot's team stats)
 def calculate_team_rating(team):
-    squad = st.session_state["team_squads"][team]
-    return sum(player["rating"] for player in squad)
-
-# Function to generate slider content
-def generate_slider_content():
-    slider_items = []
-    for team, squad in st.session_state["team_squads"].items():
-        for player in squad:
-            player_name = player["name"]
-            player_rating = player["rating"]
-            nationality = "✈️" if player["nationality"] == "Foreign" else ""
-            total_team_rating = calculate_team_rating(team)
-            slider_items.append(f"{player_name} {nationality} ({player_rating}) | {team} ({total_team_rating})")
-    
-    # If there are no players, return a default message
-    if not slider_items:
-        return "No players have been bought yet."
-    
-    # Interleave the players' details to ensure alternative display
-    interleaved_items = []
-    for i in range(250):  # Total 250 positions
-        interleaved_items.append(slider_items[i % len(slider_items)])
-    
-    return "   🏏   ".join(interleaved_items)
-
-# Function to show a popup notification
-def show_popup(message):
-    popup = st.empty()
-    popup.markdown(
-        f"""
-        <div class="popup">
-            {message}
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    time.sleep(3)  # Display the popup for 3 seconds
-    popup.empty()  # Remove the popup after 3 seconds
+    return snapshot.team_stats[team].total_rating
+
+# Function to get everything the dashboard sections display (slider, budgets, tables, rankings).
+# It is built once per snapshot version and shared as-is by every rerun and every session, so
+# a page render only passes prepared values to Streamlit until the next change is published.
+@st.cache_resource(max_entries=2)
+def get_dashboard_view(version, _snapshot):
+    return build_dashboard_view(_snapshot)
+
+# Players Sold shows this many players per page
+PLAYERS_PAGE_SIZE = 50
+
+# Function to get one page of the Players Sold table (newest first) straight from storage,
+# with the filters applied there. Pages are cached per snapshot version, so sessions looking at
+# the same page share one query until the next change. One extra row is fetched to tell whether
+# an older page exists.
+@st.cache_data(max_entries=256)
+def get_players_page(version, before_id, filters):
+    return auction_state.storage.players_page(PLAYERS_PAGE_SIZE + 1, before_id, **filters)
+
+# Functions to move between Players Sold pages. The session keeps the before_id of every page
+# it has walked through, so going back to a newer page is just dropping the last one.
+def show_older_players():
+    st.session_state["players_sold_pages"].append(st.session_state["players_sold_next_page"])
+
+def show_newer_players():
+    st.session_state["players_sold_pages"].pop()
+
+# Functions to undo and redo this session's latest player change (add, modify or delete) from
+# the admin panel, e.g. to fix a mis-keyed sale. Each admin session has its own history, so one
+# operator's Undo never takes back another's sale. They run as button callbacks, before the
+# rerun, so the whole page, including the buttons themselves, shows the result.
+def undo_player_change():
+    try:
+        description = auction_state.undo(operator)
+    except WriteConflict as conflict:
+        st.session_state["history_message"] = f"{conflict} That change can't be undone and has been dropped from the history."
+    else:
+        st.session_state["history_message"] = f"Undone: {description}."
 
-# Function to convert rank number to exponent (e.g., 2 → ²)
-def rank_to_exponent(rank):
-    exponents = {1: "¹", 2: "²", 3: "³", 4: "⁴", 5: "⁵", 6: "⁶", 7: "⁷", 8: "⁸", 9: "⁹", 10: "¹⁰"}
-    return exponents.get(rank, str(rank))
+def redo_player_change():
+    try:
+        description = auction_state.redo(operator)
+    except WriteConflict as conflict:
+        st.session_state["history_message"] = f"{conflict} That change can't be redone and has been dropped from the history."
+    else:
+        st.session_state["history_message"] = f"Redone: {description}."
+
+# Function to show a popup notification. st.toast is dismissed by the browser after a few
+# seconds, so the script carries on straight away instead of sleeping while the popup shows.
+def show_popup(message):
+    st.toast(message, icon="🏏")
 
-# Function to start a simple HTTP server to serve the CSV file
+# Function to start the export server (players, teams and squads as CSV/JSON, plus the /events
+# change feed, on port 8000).
+# Cached as a resource so it starts once per process rather than once per session.
+@st.cache_resource
 def start_http_server():
-    server_address = ('', 8000)
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
-    httpd.serve_forever()
+    try:
+        return start_export_server(auction_state.storage.export_source(), port=8000, feed=auction_state.feed)
+    except OSError:
+        return None  # Port 8000 is already taken, e.g. by another dashboard process
 
 # Start the HTTP server in a separate thread
-if not hasattr(st.session_state, "http_server_started"):
-    threading.Thread(target=start_http_server, daemon=True).start()
-    st.session_state["http_server_started"] = True
+start_http_server()
+
+# Spectator mode (open the dashboard with ?view=spectator, e.g. on a projector or TV): a read-only
+# page with no sidebar, password, admin panel or refresh controls that always auto-refreshes
+spectator_mode = st.query_params.get("view") == "spectator"
 
 # Password protection for admin actions
 admin_password = "admin123"  # Replace with your desired password
-password = st.sidebar.text_input("Enter Admin Password", type="password")
+if spectator_mode:
+    is_admin = False
+else:
+    password = st.sidebar.text_input("Enter Admin Password", type="password")
+
+    # Check if the user is an admin
+    is_admin = password == admin_password
+
+# Identifies this browser session as the operator of its admin changes, for undo/redo
+operator = st.session_state.setdefault("operator", uuid.uuid4().hex)
+
+# Function to start the sale/bid API for remote operators and scripted feeds (JSON on port 8001,
+# see sale_api.py). It only starts when AUCTION_API_TOKEN is set, and writes need that bearer
+# token. It listens on 127.0.0.1 unless AUCTION_API_HOST names another interface (e.g. 0.0.0.0).
+@st.cache_resource
+def start_api_server():
+    token = os.environ.get("AUCTION_API_TOKEN", "")
+    if not token:
+        return None
+    try:
+        return start_sale_api(auction_state, bidding_engine, token, host=os.environ.get("AUCTION_API_HOST", API_HOST))
+    except OSError:
+        return None  # Port 8001 is already taken, e.g. by another dashboard process
 
-# Check if the user is an admin
-is_admin = password == admin_password
+start_api_server()
 
 # Streamlit app title and description
 st.title("Mock IPL Auction Dashboard")
-st.write("Manage and track player details during the auction, including team budgets and squads.")
+if not spectator_mode:
+    st.write("Manage and track player details during the auction, including team budgets and squads.")
 
 # Add a refresh button
 def refresh_data():
-    st.session_state["players"] = load_players_from_db()
-    st.session_state["teams"] = load_teams_from_db()
-    st.session_state["team_budgets"] = dict(zip(st.session_state["teams"]["team"], st.session_state["teams"]["budget"]))
-    st.session_state["team_squads"] = {team: [] for team in st.session_state["team_budgets"].keys()}
-    for team in st.session_state["team_budgets"].keys():
-        squad = []
-        team_players = st.session_state["players"][st.session_state["players"]["team_bought"] == team]
-        for _, player in team_players.iterrows():
-            squad.append({
-                "id": player["id"],
-                "name": player["name"],
-                "sold_amount": player["sold_amount"],
-                "rating": player["rating"],
-                "category": player["category"],
-                "nationality": player["nationality"],
-            })
-        st.session_state["team_squads"][team] = squad
-
-if st.button("Refresh Data"):
-    refresh_data()
+    global snapshot
+    auction_state.reload()
+    snapshot = auction_state.snapshot
+
+if spectator_mode:
+    auto_refresh = True
+else:
+    if st.button("Refresh Data"):
+        refresh_data()
+
+    # Auto-refresh: on by default for viewers, off for the admin so the form isn't rerun mid-entry
+    auto_refresh = st.toggle("Auto-refresh", value=not is_admin, help="Update the page within a second or two of each sale.")
+
+# Watches for changes without rerunning the page: only this fragment runs every second. It reloads
+# the shared state if another process wrote to the database, and reruns the whole page only when
+# the published version is newer than the one this session last rendered.
+@st.fragment(run_every=1)
+def watch_for_changes():
+    auction_state.refresh_if_changed()
+    if auction_state.version != st.session_state.get("rendered_version"):
+        st.rerun()
+
+rerun_timer.section("Dashboard view")
+view = get_dashboard_view(snapshot.version, snapshot)
+
+# Function to bid for a team at the amount its paddle showed. As a button callback it runs before
+# the fragment reruns, so the fragment shows the new bid. A bid someone else beat first is refused
+# rather than raised further.
+def raise_paddle(team, amount):
+    try:
+        bidding_engine.place_bid(team, amount)
+    except BidRejected as rejected:
+        st.session_state["paddle_message"] = str(rejected)
+
+# Live Lot: the player under the hammer, the highest bid and the countdown. It is a fragment
+# that reruns on its own every second, and a paddle click only reruns the fragment, so bidding
+# never reruns the page; the page reruns once, when the hammer falls, to show the sale.
+@st.fragment(run_every=1)
+def show_live_lot():
+    lot = bidding_engine.lot
+    if lot is None:
+        return
+    previous = st.session_state.get("seen_lot")
+    st.session_state["seen_lot"] = (lot.number, lot.status)
+    if previous == (lot.number, "open") and lot.status != "open":
+        st.rerun()
+
+    st.header(f"Live Lot {lot.number}: {lot.name}")
+    lot_cols = st.columns(4)
+    lot_cols[0].metric("Highest Bid" if lot.high_bid else "Base Price", f"{(lot.high_bid.amount if lot.high_bid else lot.base_price) / 100} Cr")
+    lot_cols[1].metric("Highest Bidder", lot.high_bid.team if lot.high_bid else "-")
+    lot_cols[2].metric("Time Left", f"{max(0, int(lot.deadline - time.time()))} s" if lot.status == "open" else "-")
+    lot_cols[3].metric("Bids", lot.bid_count)
+    if lot.recent_bids:
+        st.caption("Recent bids: " + ", ".join(f"{bid.team} {bid.amount} lakhs" for bid in lot.recent_bids))
+
+    if lot.status == "sold":
+        st.success(f"SOLD: {lot.name} to {lot.high_bid.team} for {lot.high_bid.amount} lakhs!")
+    elif lot.status == "unsold":
+        st.info(f"{lot.name} went unsold.")
+    elif lot.status == "failed":
+        st.error(f"{lot.name} could not be recorded: {lot.message}")
+    elif is_admin:
+        # One paddle per team, each bidding the next increment; teams that hold the bid or can't afford it are greyed out
+        minimum = next_bid(lot)
+        st.write(f"Next bid: {minimum} lakhs")
+        paddle_cols = st.columns(5)
+        for i, (team, budget) in enumerate(auction_state.snapshot.team_budgets.items()):
+            holds_bid = lot.high_bid is not None and lot.high_bid.team == team
+            paddle_cols[i % 5].button(team, key=f"paddle_{team}", on_click=raise_paddle, args=(team, minimum),
+                                      disabled=holds_bid or budget < minimum, use_container_width=True)
+        paddle_message = st.session_state.pop("paddle_message", None)
+        if paddle_message is not None:
+            st.error(paddle_message)
+        if st.button("Close Lot Now"):
+            bidding_engine.close_lot()
+            st.rerun()
+
+rerun_timer.section("Live Lot")
+show_live_lot()
 
 # Section 0: Slider for Sold Players
-slider_content = generate_slider_content()
-st.markdown(
-    f"""
-    <div class="slider-container">
-        <div class="slider-content">
-            <div class="slider-item">{slider_content}</div>
-        </div>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
+rerun_timer.section("0 Slider")
+st.markdown(view.slider_html, unsafe_allow_html=True)
 
 # Section 1: Team Budgets (Top Section)
+rerun_timer.section("1 Team Budgets")
 st.header("Team Budgets")
 
-# Calculate team rankings
-team_rankings = []
-for team, squad in st.session_state["team_squads"].items():
-    total_points = calculate_team_rating(team)
-    team_rankings.append({"Team": team, "Total Points": total_points})
-
-# Sort teams alphabetically if total points are 0, otherwise by total points in descending order
-if all(team["Total Points"] == 0 for team in team_rankings):
-    team_rankings = sorted(team_rankings, key=lambda x: x["Team"])
-else:
-    team_rankings = sorted(team_rankings, key=lambda x: x["Total Points"], reverse=True)
-
-# Assign ranks
-for i, team in enumerate(team_rankings):
-    team["Rank"] = i + 1
-
-# Display team budgets with rankings
+# Display team budgets with rankings, each team name with its ranking as exponent (e.g., CSK²)
 budget_cols = st.columns(5)  # Display teams in 5 columns
-for i, team in enumerate(team_rankings):
-    team_name = team["Team"]
-    rank = team["Rank"]
-    budget = st.session_state["team_budgets"][team_name]
-    
-    # Display team name with ranking as exponent (e.g., CSK²)
-    team_label = f"{team_name}{rank_to_exponent(rank)}"
-    
-    # Display metric
-    budget_cols[i % 5].metric(label=team_label, value=f"{budget / 100} Cr")
+for i, (team_label, budget) in enumerate(view.budget_metrics):
+    budget_cols[i % 5].metric(label=team_label, value=budget)
 
 # Section 2: Admin Panel (Left Sidebar)
+rerun_timer.section("2 Admin Panel")
 if is_admin:
     with st.sidebar:
         st.header("Admin Panel")
         st.write("You have admin access to modify player details and add teams.")
 
+        # Undo/redo this session's latest player changes. The buttons are drawn into this spot
+        # after the forms below have run, so a change made by this rerun can be undone at once.
+        history_box = st.container()
+
         # Option to delete all data
         if st.button("Delete All Data"):
-            st.session_state["players"] = pd.DataFrame(columns=["id", "name", "sold_amount", "rating", "team_bought", "category", "nationality"])
-            st.session_state["teams"] = pd.DataFrame(columns=["team", "budget"])
-            st.session_state["team_budgets"] = {}
-            st.session_state["team_squads"] = {}
+            auction_state.delete_all()
+            snapshot = auction_state.snapshot
             st.success("All data has been deleted!")
-            save_players_to_db(st.session_state["players"])
-            save_teams_to_db(st.session_state["teams"])
 
         # Add new team and budget
         st.subheader("Add New Team")
@@ -380,16 +391,35 @@ if is_admin:
         if st.button("Add Team"):
             if new_team_name.strip() == "":
                 st.error("Team Name cannot be empty.")
-            elif new_team_name in st.session_state["team_budgets"]:
+            elif new_team_name in snapshot.team_budgets:
                 st.error(f"Team '{new_team_name}' already exists.")
             else:
-                # Add new team to the teams DataFrame
-                new_team_entry = {"team": new_team_name, "budget": new_team_budget}
-                st.session_state["teams"] = pd.concat([st.session_state["teams"], pd.DataFrame([new_team_entry])], ignore_index=True)
-                st.session_state["team_budgets"][new_team_name] = new_team_budget
-                st.session_state["team_squads"][new_team_name] = []
+                # Add new team with an empty squad
+                auction_state.add_team(new_team_name, new_team_budget)
+                snapshot = auction_state.snapshot
                 st.success(f"Team '{new_team_name}' added successfully!")
-                save_teams_to_db(st.session_state["teams"])
+
+        # Put a player up for live bidding; the lot closes by itself when the countdown runs out
+        st.subheader("Live Bidding")
+        with st.form("lot_form"):
+            lot_name = st.text_input("Lot Player Name")
+            lot_rating = st.number_input("Lot Player Rating (0-100)", min_value=0, max_value=100, step=1)
+            lot_category = st.selectbox("Lot Player Category", options=["Batter", "Bowler", "Allrounder", "Wicketkeeper"])
+            lot_nationality = st.selectbox("Lot Player Nationality", options=["Indian", "Foreign"])
+            lot_base_price = st.number_input("Base Price (in lakhs)", min_value=0, value=20, step=5)
+            lot_duration = st.number_input("Countdown (seconds)", min_value=5, value=30, step=5)
+            lot_extend = st.number_input("Extend to at least this many seconds after each bid", min_value=0, value=10, step=1)
+            if st.form_submit_button("Open Lot"):
+                if not lot_name.strip():
+                    st.error("Player Name cannot be empty.")
+                else:
+                    try:
+                        bidding_engine.open_lot(lot_name.strip(), lot_rating, lot_category, lot_nationality, lot_base_price,
+                                                duration=lot_duration, extend_seconds=lot_extend)
+                    except ValueError as problem:
+                        st.error(str(problem))
+                    else:
+                        st.success(f"Lot '{lot_name.strip()}' is open for bidding.")
 
         # Player Entry and Modification Form
         st.subheader("Player Entry and Modification")
@@ -398,7 +428,7 @@ if is_admin:
             sold_amount = st.number_input("Sold Amount (in lakhs)", min_value=0, step=1)
             
             # Dropdown showing teams and their current remaining budget, including "Unsold"
-            team_options = [f"{team} (Budget: {budget} lakhs)" for team, budget in st.session_state["team_budgets"].items()]
+            team_options = [f"{team} (Budget: {budget} lakhs)" for team, budget in snapshot.team_budgets.items()]
             team_options.insert(0, "Unsold")  # Add "Unsold" option at the beginning
             team_bought = st.selectbox("Team Bought", options=team_options)
             
@@ -422,121 +452,51 @@ if is_admin:
                 # Validate input
                 if not name.strip():
                     st.error("Player Name cannot be empty.")
-                elif team_bought != "Unsold" and st.session_state["team_budgets"][team_bought] < sold_amount:
-                    st.error(f"Insufficient budget for {team_bought}! Available budget: {st.session_state['team_budgets'][team_bought]} lakhs.")
+                elif team_bought != "Unsold" and snapshot.team_budgets[team_bought] < sold_amount:
+                    st.error(f"Insufficient budget for {team_bought}! Available budget: {snapshot.team_budgets[team_bought]} lakhs.")
                 else:
-                    # Add new player
-                    new_entry = {
-                        "id": generate_unique_id(),
-                        "name": name.strip(),
-                        "sold_amount": sold_amount if team_bought != "Unsold" else 0,  # Set sold amount to 0 if unsold
-                        "rating": rating,
-                        "team_bought": team_bought,
-                        "category": category,
-                        "nationality": nationality,
-                    }
-                    st.session_state["players"] = pd.concat(
-                        [st.session_state["players"], pd.DataFrame([new_entry])],
-                        ignore_index=True,
-                    ).copy()  # Use copy() to force rerun
-
-                    # If the player is not unsold, add them to the team's squad and deduct the sold amount
-                    if team_bought != "Unsold":
-                        st.session_state["team_squads"][team_bought].append({
-                            "id": new_entry["id"],
-                            "name": name.strip(),
-                            "sold_amount": sold_amount,
-                            "rating": rating,
-                            "category": category,
-                            "nationality": nationality,
-                        })
-                        st.session_state["team_budgets"][team_bought] -= sold_amount
-                        
-                        # Update the teams DataFrame and save to database
-                        teams_df = st.session_state["teams"].copy()
-                        teams_df.loc[teams_df["team"] == team_bought, "budget"] = st.session_state["team_budgets"][team_bought]
-                        save_teams_to_db(teams_df)
-
-                        # Show popup notification
-                        popup_message = f"Congratulations {name.strip()} ({rating}) | {team_bought} ({calculate_team_rating(team_bought)})"
-                        show_popup(popup_message)
-
-                    st.success(f"Player '{name}' added successfully!")
-                    save_players_to_db(st.session_state["players"])  # Save players data to database
+                    # Add new player (names are unique, so a taken name comes back as None)
+                    try:
+                        new_entry = auction_state.add_player(name.strip(), sold_amount, rating, team_bought, category, nationality,
+                                                             operator=operator)
+                    except WriteConflict as conflict:
+                        snapshot = auction_state.snapshot
+                        st.error(f"{conflict} Nothing was saved; the page now shows the latest data.")
+                    else:
+                        snapshot = auction_state.snapshot
+
+                        if new_entry is None:
+                            st.error(f"Player '{name}' already exists. Use Modify Player to change their details.")
+                        else:
+                            if team_bought != "Unsold":
+                                # Show popup notification
+                                popup_message = f"Congratulations {name.strip()} ({rating}) | {team_bought} ({calculate_team_rating(team_bought)})"
+                                show_popup(popup_message)
+
+                            st.success(f"Player '{name}' added successfully!")
 
             if submitted_modify:
                 # Validate input
                 if not name.strip():
                     st.error("Player Name cannot be empty.")
-                elif team_bought != "Unsold" and st.session_state["team_budgets"][team_bought] < sold_amount:
-                    st.error(f"Insufficient budget for {team_bought}! Available budget: {st.session_state['team_budgets'][team_bought]} lakhs.")
+                elif team_bought != "Unsold" and snapshot.team_budgets[team_bought] < sold_amount:
+                    st.error(f"Insufficient budget for {team_bought}! Available budget: {snapshot.team_budgets[team_bought]} lakhs.")
                 else:
                     # Check if the player already exists
-                    if name.strip() in st.session_state["players"]["name"].values:
+                    player_id = auction_state.find_player_id(name.strip())
+                    if player_id is not None:
                         # Modify existing player
-                        player_id = st.session_state["players"].loc[st.session_state["players"]["name"] == name.strip(), "id"].values[0]
-                        original_team = st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "team_bought"].values[0]
-                        old_sold_amount = st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "sold_amount"].values[0]
-
-                        # If the team is changed, adjust budgets and squads
-                        if original_team != team_bought:
-                            # Add the old sold amount back to the original team's budget (if the player was not unsold)
-                            if original_team != "Unsold":
-                                st.session_state["team_budgets"][original_team] += old_sold_amount 
-                                # Update original team's budget in database
-                                teams_df = st.session_state["teams"].copy()
-                                teams_df.loc[teams_df["team"] == original_team, "budget"] = st.session_state["team_budgets"][original_team]
-                                save_teams_to_db(teams_df)
-
-                                # Remove the player from the original team's squad
-                                st.session_state["team_squads"][original_team] = [
-                                    player for player in st.session_state["team_squads"][original_team] if player["id"] != player_id
-                                ]
-
-                            # Deduct the new sold amount from the new team's budget (if not unsold)
-                            if team_bought != "Unsold":
-                                st.session_state["team_budgets"][team_bought] -= sold_amount
-                                # Update new team's budget in database
-                                teams_df = st.session_state["teams"].copy()
-                                teams_df.loc[teams_df["team"] == team_bought, "budget"] = st.session_state["team_budgets"][team_bought]
-                                save_teams_to_db(teams_df)
-                                # Add the player to the new team's squad
-                                st.session_state["team_squads"][team_bought].append({
-                                    "id": player_id,
-                                    "name": name.strip(),
-                                    "sold_amount": sold_amount,
-                                    "rating": rating,
-                                    "category": category,
-                                    "nationality": nationality,
-                                })
+                        try:
+                            updated_player = auction_state.modify_player(player_id, name.strip(), sold_amount, rating, team_bought, category, nationality,
+                                                                     operator=operator)
+                        except WriteConflict as conflict:
+                            st.error(f"{conflict} Nothing was saved; the page now shows the latest data.")
                         else:
-                            # If the team is not changed, adjust the budget by the difference between the new and old sold amount
-                            if team_bought != "Unsold":
-                                price_difference = sold_amount - old_sold_amount
-                                st.session_state["team_budgets"][team_bought] -= price_difference
-                                # Update team's budget in database
-                                teams_df = st.session_state["teams"].copy()
-                                teams_df.loc[teams_df["team"] == team_bought, "budget"] = st.session_state["team_budgets"][team_bought]
-                                save_teams_to_db(teams_df)
-
-                                # Update the player's price in the team's squad
-                                for player in st.session_state["team_squads"][team_bought]:
-                                    if player["id"] == player_id:
-                                        player["sold_amount"] = sold_amount
-                                        player["rating"] = rating
-                                        player["category"] = category
-                                        player["nationality"] = nationality
-
-                        # Update the player's details in the global player list
-                        st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "name"] = name.strip()
-                        st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "sold_amount"] = sold_amount if team_bought != "Unsold" else 0
-                        st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "rating"] = rating
-                        st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "team_bought"] = team_bought
-                        st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "category"] = category
-                        st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "nationality"] = nationality
-
-                        st.success(f"Player '{name}' modified successfully!")
-                        save_players_to_db(st.session_state["players"])  # Save players data to database
+                            if updated_player is not None:
+                                st.success(f"Player '{name}' modified successfully!")
+                            else:
+                                st.error(f"Player '{name}' does not exist. Please add the player first.")
+                        snapshot = auction_state.snapshot
                     else:
                         st.error(f"Player '{name}' does not exist. Please add the player first.")
 
@@ -546,89 +506,127 @@ if is_admin:
                     st.error("Player Name cannot be empty.")
                 else:
                     # Check if the player exists
-                    if name.strip() in st.session_state["players"]["name"].values:
-                        # Delete existing player
-                        player_id = st.session_state["players"].loc[st.session_state["players"]["name"] == name.strip(), "id"].values[0]
-                        original_team = st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "team_bought"].values[0]
-                        old_sold_amount = st.session_state["players"].loc[st.session_state["players"]["id"] == player_id, "sold_amount"].values[0]
-
-                        # Add the old sold amount back to the original team's budget (if not unsold)
-                        if original_team != "Unsold":
-                            st.session_state["team_budgets"][original_team] += old_sold_amount
-                            # Update original team's budget in database
-                            teams_df = st.session_state["teams"].copy()
-                            teams_df.loc[teams_df["team"] == original_team, "budget"] = st.session_state["team_budgets"][original_team]
-                            save_teams_to_db(teams_df)
-                            # Remove the player from the original team's squad
-                            st.session_state["team_squads"][original_team] = [
-                                player for player in st.session_state["team_squads"][original_team] if player["id"] != player_id
-                            ]
-
-                        # Remove the player from the global player list
-                        st.session_state["players"] = st.session_state["players"][st.session_state["players"]["name"] != name.strip()]
-                        st.session_state["players"] = st.session_state["players"].copy()  # Force rerun
-
-                        st.success(f"Player '{name}' deleted successfully!")
-                        save_players_to_db(st.session_state["players"])  # Save players data to database
+                    player_id = auction_state.find_player_id(name.strip())
+                    if player_id is not None:
+                        # Delete existing player and refund their team
+                        try:
+                            deleted = auction_state.delete_player(player_id, operator=operator)
+                        except WriteConflict as conflict:
+                            st.error(f"{conflict} Nothing was saved; the page now shows the latest data.")
+                        else:
+                            if deleted:
+                                st.success(f"Player '{name}' deleted successfully!")
+                            else:
+                                st.error(f"Player '{name}' does not exist.")
+                        snapshot = auction_state.snapshot
                     else:
                         st.error(f"Player '{name}' does not exist.")
 
+        # Bulk import from a CSV shaped like players.csv (Name, Sold Amount, Rating, Team Bought,
+        # Category, Nationality); nothing is imported unless every row is valid
+        st.subheader("Bulk Import Players")
+        players_file = st.file_uploader("Players CSV", type="csv")
+        if st.button("Import Players", disabled=players_file is None):
+            try:
+                import_frame = read_players_csv(players_file)
+            except (ValueError, pd.errors.ParserError) as problem:
+                st.error(f"Could not read the file: {problem}")
+            else:
+                start = time.perf_counter()
+                try:
+                    imported, import_errors = auction_state.import_players(import_frame)
+                except WriteConflict as conflict:
+                    st.error(f"{conflict} Nothing was saved; the page now shows the latest data.")
+                else:
+                    elapsed = time.perf_counter() - start
+                    if import_errors.empty:
+                        st.success(f"Imported {len(imported)} players in {elapsed:.2f} s ({len(imported) / max(elapsed, 1e-9):,.0f} rows/s).")
+                    else:
+                        st.error(f"Nothing was imported: {len(import_errors)} problem(s) in the file.")
+                        st.dataframe(import_errors, hide_index=True)
+                snapshot = auction_state.snapshot
+
+        with history_box:
+            history_cols = st.columns(2)
+            last_change, last_undone = auction_state.history_heads(operator)
+            history_cols[0].button("Undo", on_click=undo_player_change, disabled=last_change is None,
+                                   help=f"Undo your change: {last_change.description}" if last_change else "Nothing to undo")
+            history_cols[1].button("Redo", on_click=redo_player_change, disabled=last_undone is None,
+                                   help=f"Redo your change: {last_undone.description}" if last_undone else "Nothing to redo")
+            history_message = st.session_state.pop("history_message", None)
+            if history_message is not None:
+                st.info(history_message)
+
+# Sections 3-6 show the latest snapshot, including any change made in the admin panel above
+rerun_timer.section("Dashboard view")
+view = get_dashboard_view(snapshot.version, snapshot)
+
 # Section 3: Players Sold List (Left Section)
+rerun_timer.section("3 Players Sold")
 st.header("Players Sold")
-if not st.session_state["players"].empty:
-    # Sort players by ID in descending order (latest at the top)
-    sorted_players = st.session_state["players"].sort_values(by="id", ascending=False).copy()
-    st.dataframe(sorted_players, use_container_width=True, key="players_sold")
+
+# Filters (spectators get the newest players unfiltered)
+filters = {}
+if not spectator_mode:
+    filter_cols = st.columns(5)
+    team_filter = filter_cols[0].selectbox("Team", ["All"] + list(snapshot.team_budgets) + ["Unsold"], key="players_sold_team")
+    category_filter = filter_cols[1].selectbox("Category", ["All", "Batter", "Bowler", "Allrounder", "Wicketkeeper"], key="players_sold_category")
+    nationality_filter = filter_cols[2].selectbox("Nationality", ["All", "Indian", "Foreign"], key="players_sold_nationality")
+    min_price = filter_cols[3].number_input("Min Price (in lakhs)", min_value=0, step=10, key="players_sold_min_price")
+    max_price = filter_cols[4].number_input("Max Price (in lakhs, 0 = any)", min_value=0, step=10, key="players_sold_max_price")
+    filters = {
+        "team": None if team_filter == "All" else team_filter,
+        "category": None if category_filter == "All" else category_filter,
+        "nationality": None if nationality_filter == "All" else nationality_filter,
+        "min_price": min_price or None,
+        "max_price": max_price or None,
+    }
+
+# Start again from the newest page whenever the filters change
+if st.session_state.get("players_sold_filters") != filters or spectator_mode:
+    st.session_state["players_sold_filters"] = filters
+    st.session_state["players_sold_pages"] = [None]
+pages = st.session_state["players_sold_pages"]
+
+players_page = get_players_page(snapshot.version, pages[-1], filters)
+has_older = len(players_page) > PLAYERS_PAGE_SIZE
+players_page = players_page.head(PLAYERS_PAGE_SIZE)
+if has_older:
+    st.session_state["players_sold_next_page"] = int(players_page["id"].iloc[-1])
+
+if not players_page.empty:
+    # Sorted by ID in descending order (latest at the top)
+    st.dataframe(players_page, use_container_width=True, hide_index=True, key="players_sold")
+    if not spectator_mode:
+        page_cols = st.columns([1, 1, 4])
+        page_cols[0].button("Newer", on_click=show_newer_players, disabled=len(pages) == 1, key="players_sold_newer")
+        page_cols[1].button("Older", on_click=show_older_players, disabled=not has_older, key="players_sold_older")
+        page_cols[2].write(f"Page {len(pages)}")
+elif any(value is not None for value in filters.values()):
+    st.write("No players match these filters.")
 else:
     st.write("No players sold yet.")
 
 # Section 4: Team Squad (Right Section)
+rerun_timer.section("4 Team Squad")
 st.header("Team Squad")
 
 # Ensure selected_team is not None
-if "team_squads" in st.session_state and st.session_state["team_squads"]:
+if view.squads:
     selected_team = st.selectbox(
         "Select Team to View Squad",
-        list(st.session_state["team_squads"].keys()),
+        list(view.squads.keys()),
         index=0,  # Default to the first team
     )
 
-    if selected_team and selected_team in st.session_state["team_squads"]:
-        # Always fetch the latest squad for the selected team
-        squad = st.session_state["team_squads"][selected_team]
-        if squad:
-            squad_df = pd.DataFrame(squad)
-
-            # Calculate totals
-            total_sold = squad_df["sold_amount"].sum()
-            total_rating = squad_df["rating"].sum()
-            total_remaining_budget = st.session_state["team_budgets"][selected_team]
-
-            # Convert totals to Crores (Cr)
-            total_sold_cr = total_sold / 100
-            total_remaining_budget_cr = total_remaining_budget / 100
-
-            # Count categories and nationalities
-            num_batters = squad_df[squad_df["category"] == "Batter"].shape[0]
-            num_bowlers = squad_df[squad_df["category"] == "Bowler"].shape[0]
-            num_allrounders = squad_df[squad_df["category"] == "Allrounder"].shape[0]
-            num_wicketkeepers = squad_df[squad_df["category"] == "Wicketkeeper"].shape[0]
-            num_indian = squad_df[squad_df["nationality"] == "Indian"].shape[0]
-            num_foreign = squad_df[squad_df["nationality"] == "Foreign"].shape[0]
-            num_players = squad_df.shape[0]
-
+    if selected_team and selected_team in view.squads:
+        # Always show the latest squad for the selected team
+        squad_view = view.squads[selected_team]
+        if squad_view.table is not None:
             # Display squad details
-            st.table(squad_df)
-            st.write(f"**Total Spend Amount of {selected_team}: {total_sold_cr} Cr**")
-            st.write(f"**Total Rating for {selected_team}: {total_rating}**")
-            st.write(f"**Remaining Budget of {selected_team}: {total_remaining_budget_cr} Cr**")
-            st.write(f"**No. of Batters: {num_batters}**")
-            st.write(f"**No. of Bowlers: {num_bowlers}**")
-            st.write(f"**No. of Allrounders: {num_allrounders}**")
-            st.write(f"**No. of Wicketkeepers: {num_wicketkeepers}**")
-            st.write(f"**No. of Indian Players: {num_indian}**")
-            st.write(f"**No. of Foreign Players: {num_foreign}**")
-            st.write(f"**Total No. of Players Bought: {num_players}**")
+            st.table(squad_view.table)
+            for line in squad_view.summary:
+                st.write(line)
         else:
             st.write(f"No players bought by {selected_team} yet.")
     else:
@@ -637,29 +635,51 @@ else:
     st.write("No teams available yet.")
 
 # Section 5: Team Rankings (Right Section)
+rerun_timer.section("5 Team Rankings")
 st.header("Team Rankings")
-team_rankings = []
-
-# Calculate total points (ratings) for each team
-for team, squad in st.session_state["team_squads"].items():
-    total_points = calculate_team_rating(team)
-    team_rankings.append({"Team": team, "Total Points": total_points})
 
-# Sort teams by total points in descending order
-team_rankings = sorted(team_rankings, key=lambda x: x["Total Points"], reverse=True)
-
-# Display rankings
-if team_rankings:
+# Display rankings (teams sorted by total points in descending order)
+if view.rankings:
     st.write("Teams ranked by total points (ratings):")
-    for i, team in enumerate(team_rankings):
-        st.write(f"{i + 1}. {team['Team']}: {team['Total Points']} points")
+    for line in view.rankings:
+        st.write(line)
 else:
     st.write("No teams have bought players yet.")
 
 # Section 6: Unsold Players (Left Section)
+rerun_timer.section("6 Unsold Players")
 st.header("Unsold Players")
-unsold_players = st.session_state["players"][st.session_state["players"]["team_bought"] == "Unsold"]
-if not unsold_players.empty:
-    st.dataframe(unsold_players, use_container_width=True)
+if not view.unsold_players.empty:
+    st.dataframe(view.unsold_players, use_container_width=True)
 else:       
     st.write("No unsold players yet.")
+
+# Remember which version this session rendered, then start watching for newer ones
+st.session_state["rendered_version"] = snapshot.version
+if auto_refresh:
+    watch_for_changes()
+
+rerun_timer.finish(timing_log, "spectator" if spectator_mode else "admin" if is_admin else "viewer")
+if profiler is not None:
+    st.session_state["rerun_profile"] = profile_report(profiler)
+
+# Render Timings panel (admin only, below the Admin Panel): this rerun's sections and DB calls,
+# a summary of recent reruns across all sessions, the full log as CSV, and a one-rerun profile
+if is_admin:
+    with st.sidebar:
+        st.header("Render Timings")
+        st.write(f"This rerun took {rerun_timer.total * 1000:.1f} ms.")
+        st.dataframe(rerun_timer.to_frame(), use_container_width=True, hide_index=True)
+
+        st.subheader("Recent Reruns")
+        st.write(f"{timing_log.reruns} reruns across all sessions since the server started:")
+        st.dataframe(timing_log.summary(), use_container_width=True, hide_index=True)
+        st.download_button("Download Timing Log", timing_log.to_csv(), file_name="render_timings.csv", mime="text/csv")
+
+        if st.button("Profile Next Rerun"):
+            st.session_state["profile_next_rerun"] = True
+            st.rerun()
+        if "rerun_profile" in st.session_state:
+            with st.expander("cProfile of the last profiled rerun"):
+                st.code(st.session_state["rerun_profile"])
+            st.download_button("Download Profile", st.session_state["rerun_profile"], file_name="rerun_profile.txt")
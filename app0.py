@@ -2,8 +2,7 @@ import streamlit as st
 import pandas as pd
 import time
 import os
-from http.server import SimpleHTTPRequestHandler, HTTPServer
-import threading
+from export_server import start_export_server, CsvExportSource
 
 # Set up the Streamlit page (must be the first command)
 st.set_page_config(layout="wide")  # Use the full width of the screen
@@ -222,16 +221,17 @@ def rank_to_exponent(rank):
 def save_players_to_csv():
     st.session_state["players"].to_csv("players.csv", index=False)
 
-# Function to start a simple HTTP server to serve the CSV file
+# Function to start the export server (players, teams and squads as CSV/JSON on port 8000).
+# Cached as a resource so it starts once per process rather than once per session.
+@st.cache_resource
 def start_http_server():
-    server_address = ('', 8000)
-    httpd = HTTPServer(server_address, SimpleHTTPRequestHandler)
-    httpd.serve_forever()
+    try:
+        return start_export_server(CsvExportSource("players.csv", "teams.csv"), port=8000)
+    except OSError:
+        return None  # Port 8000 is already taken, e.g. by another dashboard process
 
 # Start the HTTP server in a separate thread
-if not hasattr(st.session_state, "http_server_started"):
-    threading.Thread(target=start_http_server, daemon=True).start()
-    st.session_state["http_server_started"] = True
+start_http_server()
 
 # Password protection for admin actions
 admin_password = "admin123"  # Replace with your desired password
@@ -0,0 +1,342 @@
+import sqlite3
+import pandas as pd
+
+# Calls made during a rerun of app.py are timed for the admin's timing panel
+from render_timing import timed_db_call
+
+PLAYER_COLUMNS = ["id", "name", "sold_amount", "rating", "team_bought", "category", "nationality"]
+# The player columns as loaded for the shared snapshot: the row's version goes with it, for
+# the compare-and-swap on modify and delete
+VERSIONED_PLAYER_COLUMNS = PLAYER_COLUMNS + ["version"]
+TEAM_COLUMNS = ["team", "budget"]
+
+DB_PATH = "auction.db"
+
+# Database setup
+def init_db(path=DB_PATH):
+    # IMMEDIATE takes the write lock when a transaction starts, so two writers never deadlock upgrading a read lock
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level="IMMEDIATE", timeout=5)
+    # WAL lets readers keep reading while a sale commits; NORMAL skips the per-commit fsync of the WAL,
+    # which is still crash-safe (a power cut can only lose the most recent commits, never corrupt the file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Create the tables, or bring an existing file up to the current schema
+    migrate(conn)
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+# Schema migrations. PRAGMA user_version records how many of MIGRATIONS a database
+# file has had; migrate() applies the rest in order, each in its own transaction,
+# so an older auction.db is upgraded the first time a newer app opens it.
+#
+# Schema after migration 1:
+#     teams    team TEXT PRIMARY KEY, budget
+#     players  id INTEGER PRIMARY KEY AUTOINCREMENT, name (unique), sold_amount, rating,
+#              team_bought (foreign key to teams, NULL while the player is unsold),
+#              category, nationality; indexed on team_bought and name
+#
+# The rest of the app still says "Unsold": the loaders and _player_params convert.
+#
+# Migration 2 adds players.version, 0 when a row is inserted and bumped by every update.
+
+# Migration 1: real keys, constraints and indexes. Files written by the old
+# to_sql(if_exists="replace") code have key-less copies of both tables, so the rows
+# are copied into freshly declared tables. Along the way:
+#   - a repeated team keeps its first row
+#   - a player whose team is missing from teams gets that team back with a budget of 0
+#   - a player with a missing or repeated id gets the next free id
+#   - a repeated player name keeps its first holder; later ones get " (<id>)" appended,
+#     which also makes them reachable from the name-based admin form again
+def _migration_1_keys_and_indexes(conn):
+    conn.execute(
+        """CREATE TABLE teams_v1 (
+            team TEXT PRIMARY KEY,
+            budget INTEGER NOT NULL DEFAULT 0
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE players_v1 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            sold_amount INTEGER NOT NULL DEFAULT 0,
+            rating INTEGER,
+            team_bought TEXT REFERENCES teams (team),
+            category TEXT,
+            nationality TEXT
+        )"""
+    )
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "teams" in tables:
+        conn.execute("INSERT OR IGNORE INTO teams_v1 (team, budget) SELECT team, COALESCE(budget, 0) FROM teams ORDER BY rowid")
+        conn.execute("DROP TABLE teams")
+    if "players" in tables:
+        rows = conn.execute(
+            "SELECT id, name, sold_amount, rating, team_bought, category, nationality FROM players ORDER BY rowid"
+        ).fetchall()
+        next_id = max([row[0] for row in rows if isinstance(row[0], int)], default=0) + 1
+        ids, names, migrated = set(), set(), []
+        for player_id, name, sold_amount, rating, team_bought, category, nationality in rows:
+            if not isinstance(player_id, int) or player_id < 1 or player_id in ids:
+                player_id, next_id = next_id, next_id + 1
+            ids.add(player_id)
+            name = "" if name is None else str(name)
+            if name in names:
+                name = f"{name} ({player_id})"
+            names.add(name)
+            team_bought = None if team_bought in (None, "", "Unsold") else str(team_bought)
+            migrated.append((player_id, name, sold_amount or 0, rating, team_bought, category, nationality))
+        conn.executemany(
+            "INSERT OR IGNORE INTO teams_v1 (team, budget) VALUES (?, 0)",
+            sorted({(row[4],) for row in migrated if row[4] is not None}),
+        )
+        conn.executemany("INSERT INTO players_v1 VALUES (?, ?, ?, ?, ?, ?, ?)", migrated)
+        conn.execute("DROP TABLE players")
+    conn.execute("ALTER TABLE teams_v1 RENAME TO teams")
+    conn.execute("ALTER TABLE players_v1 RENAME TO players")
+    conn.execute("CREATE INDEX players_team_bought ON players (team_bought)")
+    conn.execute("CREATE UNIQUE INDEX players_name ON players (name)")
+
+# Migration 2: a version per player row, so a modify or delete can check the row is exactly
+# the one it was worked out from (see _PLAYER_UNCHANGED)
+def _migration_2_player_versions(conn):
+    conn.execute("ALTER TABLE players ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+MIGRATIONS = [
+    _migration_1_keys_and_indexes,
+    _migration_2_player_versions,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Function to apply any migrations the database hasn't had yet
+def migrate(conn):
+    # Foreign keys stay off while tables are rebuilt (the documented SQLite procedure);
+    # each migration is followed by a foreign_key_check instead
+    conn.execute("PRAGMA foreign_keys=OFF")
+    while True:
+        # Read the version inside the write transaction, so two processes starting at
+        # once can't both apply the same migration
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                return
+            MIGRATIONS[version](conn)
+            problems = conn.execute("PRAGMA foreign_key_check").fetchall()
+            if problems:
+                raise sqlite3.IntegrityError(f"migration {version + 1} left players without a matching team: {problems[:5]}")
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+# Function to load team data from the database
+@timed_db_call
+def load_teams_from_db(conn):
+    return pd.read_sql("SELECT team, budget FROM teams", conn)
+
+# Function to load player data, with each row's version, from the database (unsold players
+# have no team in the table)
+@timed_db_call
+def load_players_from_db(conn):
+    return pd.read_sql(
+        """SELECT id, name, sold_amount, rating, COALESCE(team_bought, 'Unsold') AS team_bought, category, nationality,
+            version
+        FROM players""",
+        conn,
+    )
+
+# Function to open a read-only connection, for page queries that shouldn't share (and see
+# the open transactions of) the writer's connection
+def connect_read_only(path=DB_PATH):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+# Function to load one page of players, newest first, that match the given filters (None
+# means any; team "Unsold" matches unsold players). Keyset pagination: pass the last id of
+# one page as before_id to get the next, so every page costs the same however deep it is.
+@timed_db_call
+def load_players_page(conn, limit, before_id=None, team=None, category=None, nationality=None,
+                      min_price=None, max_price=None):
+    conditions, params = [], {"limit": int(limit)}
+    if before_id is not None:
+        conditions.append("id < :before_id")
+        params["before_id"] = int(before_id)
+    if team == "Unsold":
+        conditions.append("team_bought IS NULL")
+    elif team is not None:
+        conditions.append("team_bought = :team")
+        params["team"] = str(team)
+    if category is not None:
+        conditions.append("category = :category")
+        params["category"] = str(category)
+    if nationality is not None:
+        conditions.append("nationality = :nationality")
+        params["nationality"] = str(nationality)
+    if min_price is not None:
+        conditions.append("sold_amount >= :min_price")
+        params["min_price"] = int(min_price)
+    if max_price is not None:
+        conditions.append("sold_amount <= :max_price")
+        params["max_price"] = int(max_price)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return pd.read_sql(
+        f"""SELECT id, name, sold_amount, rating, COALESCE(team_bought, 'Unsold') AS team_bought, category, nationality
+        FROM players {where} ORDER BY id DESC LIMIT :limit""",
+        conn,
+        params=params,
+    )
+
+# Convert a player dict into plain Python values that sqlite3 can bind (no numpy scalars, and
+# NULL rather than "Unsold" for the team)
+def _player_params(player):
+    return {
+        "id": None if player.get("id") is None else int(player["id"]),
+        "name": str(player["name"]),
+        "sold_amount": int(player["sold_amount"]),
+        "rating": int(player["rating"]),
+        "team_bought": None if player["team_bought"] == "Unsold" else str(player["team_bought"]),
+        "category": str(player["category"]),
+        "nationality": str(player["nationality"]),
+    }
+
+# Row-level writes. None of these commit on their own: callers group the
+# statements for one change under `with conn:` so they land in a single transaction.
+
+# Function to insert one player row; returns its id. A player without an id is given the
+# next one by SQLite (AUTOINCREMENT: never reused, and allocated under the write lock, so
+# concurrent writers, even in other processes, can't be handed the same id).
+def insert_player(conn, player):
+    cursor = conn.execute(
+        """INSERT INTO players (id, name, sold_amount, rating, team_bought, category, nationality)
+        VALUES (:id, :name, :sold_amount, :rating, :team_bought, :category, :nationality)""",
+        _player_params(player),
+    )
+    return cursor.lastrowid
+
+# Function to insert many player rows with one executemany; ids are given by SQLite
+def insert_players(conn, players):
+    conn.executemany(
+        """INSERT INTO players (id, name, sold_amount, rating, team_bought, category, nationality)
+        VALUES (:id, :name, :sold_amount, :rating, :team_bought, :category, :nationality)""",
+        (_player_params(player) for player in players),
+    )
+
+# Raised when a conditional write finds the database no longer matches what the change was
+# based on, because another operator (another session or process) got there first. The
+# change's transaction is rolled back, so none of it is committed.
+class WriteConflict(Exception):
+    pass
+
+# Compare-and-swap condition for a player row: it must still be at the version the change
+# was worked out from. Every update bumps the version, so an edit to any column (rating,
+# category, name, ...) by another operator meanwhile is caught, not just a team or price change.
+_PLAYER_UNCHANGED = "version = :expected_version"
+
+def _expected_params(previous):
+    return {"expected_version": int(previous["version"])}
+
+# Function to update one player row in place and bump its version. Given previous (the row,
+# with its version, as the caller last read it), the update only applies if the row is still
+# at that version, else WriteConflict.
+def update_player(conn, player, previous=None):
+    sql = """UPDATE players
+        SET name = :name, sold_amount = :sold_amount, rating = :rating,
+            team_bought = :team_bought, category = :category, nationality = :nationality,
+            version = version + 1
+        WHERE id = :id"""
+    params = _player_params(player)
+    if previous is not None:
+        sql += " AND " + _PLAYER_UNCHANGED
+        params.update(_expected_params(previous))
+    if conn.execute(sql, params).rowcount == 0 and previous is not None:
+        raise WriteConflict(f"Player '{previous['name']}' was changed or deleted by another operator.")
+
+# Function to delete one player row. Given previous, only deletes it if it is still at that version, else WriteConflict.
+def delete_player(conn, player_id, previous=None):
+    sql = "DELETE FROM players WHERE id = :id"
+    params = {"id": int(player_id)}
+    if previous is not None:
+        sql += " AND " + _PLAYER_UNCHANGED
+        params.update(_expected_params(previous))
+    if conn.execute(sql, params).rowcount == 0 and previous is not None:
+        raise WriteConflict(f"Player '{previous['name']}' was changed or deleted by another operator.")
+
+# Function to insert one team row
+@timed_db_call
+def insert_team(conn, team, budget):
+    conn.execute("INSERT INTO teams (team, budget) VALUES (?, ?)", (str(team), int(budget)))
+
+# Function to set a single team's budget
+def update_team_budget(conn, team, budget):
+    conn.execute("UPDATE teams SET budget = ? WHERE team = ?", (int(budget), str(team)))
+
+# Function to move a team's budget by change (negative for a purchase); returns the new budget.
+# The check and the update are one statement, so concurrent sales from other operators
+# can neither be overwritten nor overspend the team: a purchase the team can no longer
+# afford raises WriteConflict.
+def change_team_budget(conn, team, change):
+    cursor = conn.execute(
+        "UPDATE teams SET budget = budget + :change WHERE team = :team AND (:change >= 0 OR budget >= -:change)",
+        {"team": str(team), "change": int(change)},
+    )
+    if cursor.rowcount == 0:
+        raise WriteConflict(f"Insufficient budget for {team}: another operator has spent it since this page loaded.")
+    return conn.execute("SELECT budget FROM teams WHERE team = ?", (str(team),)).fetchone()[0]
+
+# Function to clear every player and team
+@timed_db_call
+def delete_all_data(conn):
+    conn.execute("DELETE FROM players")
+    conn.execute("DELETE FROM teams")
+
+# Atomic change helpers: the player row and every affected team budget commit together or
+# not at all. Budget changes are a dict of team -> amount to add (negative for a purchase),
+# and each helper returns the resulting budgets, team -> budget, as stored.
+
+# Function to record a new player with its budget changes; returns (player id, new budgets)
+@timed_db_call
+def record_player_add(conn, player, budget_changes):
+    with conn:
+        player_id = insert_player(conn, player)
+        budgets = {team: change_team_budget(conn, team, change) for team, change in budget_changes.items()}
+    return player_id, budgets
+
+# Function to record several new players, each with its own budget changes, in one transaction
+# (a group commit); returns (player ids in order, new budgets). A conflict on any of them rolls
+# back the whole batch.
+@timed_db_call
+def record_player_adds(conn, sales):
+    player_ids, budgets = [], {}
+    with conn:
+        for player, budget_changes in sales:
+            player_ids.append(insert_player(conn, player))
+            for team, change in budget_changes.items():
+                budgets[team] = change_team_budget(conn, team, change)
+    return player_ids, budgets
+
+# Function to record a modified player with its budget changes; previous is the row (with
+# its version) the change was worked out from. The stored row's version goes up by one.
+@timed_db_call
+def record_player_modify(conn, player, previous, budget_changes):
+    with conn:
+        update_player(conn, player, previous)
+        budgets = {team: change_team_budget(conn, team, change) for team, change in budget_changes.items()}
+    return budgets
+
+# Function to record a deleted player with its budget refund; previous is the row as last read
+@timed_db_call
+def record_player_delete(conn, player_id, previous, budget_changes):
+    with conn:
+        delete_player(conn, player_id, previous)
+        budgets = {team: change_team_budget(conn, team, change) for team, change in budget_changes.items()}
+    return budgets
+
+# Function to record a bulk import of players (dicts) with their teams' total budget changes;
+# returns the new budgets
+@timed_db_call
+def record_player_import(conn, players, budget_changes):
+    with conn:
+        insert_players(conn, players)
+        budgets = {team: change_team_budget(conn, team, change) for team, change in budget_changes.items()}
+    return budgets
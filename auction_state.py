@@ -0,0 +1,671 @@
+import sqlite3
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import pandas as pd
+
+from change_feed import ChangeFeed
+from auction_db import PLAYER_COLUMNS, VERSIONED_PLAYER_COLUMNS, WriteConflict
+from bulk_import import validate_players, import_budget_changes
+
+
+# Read-only mapping that each snapshot shares with the one it was built from. Keys are spread
+# over BUCKETS small dicts by hash, and a change copies only the dicts holding the changed keys
+# (plus the tuple listing the dicts), so publishing an edit costs about the same with a hundred
+# players or a hundred thousand.
+# Iteration order follows the buckets, not insertion; use sorted_values for a stable order.
+class SharedMap(Mapping):
+    BUCKETS = 512
+
+    def __init__(self, items=()):
+        count = self.BUCKETS
+        buckets = [{} for _ in range(count)]
+        for key, value in (items.items() if isinstance(items, Mapping) else items):
+            buckets[hash(key) % count][key] = value
+        self._buckets = tuple(buckets)
+        self._size = sum(len(bucket) for bucket in buckets)
+
+    def __getitem__(self, key):
+        return self._buckets[hash(key) % self.BUCKETS][key]
+
+    def __contains__(self, key):
+        return key in self._buckets[hash(key) % self.BUCKETS]
+
+    def get(self, key, default=None):
+        return self._buckets[hash(key) % self.BUCKETS].get(key, default)
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __len__(self):
+        return self._size
+
+    # Read straight from the buckets rather than through a lookup per key
+    def values(self):
+        for bucket in self._buckets:
+            yield from bucket.values()
+
+    def items(self):
+        for bucket in self._buckets:
+            yield from bucket.items()
+
+    # Function to get the values ordered by key (player ids: the order players were added)
+    def sorted_values(self):
+        return [self[key] for key in sorted(self)]
+
+    # Function to get a new map with some keys removed and then others set; this one is unchanged
+    def changed(self, updates=None, removals=()):
+        buckets = list(self._buckets)
+        copied = set()
+        size = self._size
+        for key in removals:
+            i = hash(key) % self.BUCKETS
+            if key in buckets[i]:
+                if i not in copied:
+                    buckets[i] = dict(buckets[i])
+                    copied.add(i)
+                del buckets[i][key]
+                size -= 1
+        for key, value in (updates or {}).items():
+            i = hash(key) % self.BUCKETS
+            if i not in copied:
+                buckets[i] = dict(buckets[i])
+                copied.add(i)
+            size += key not in buckets[i]
+            buckets[i][key] = value
+        new = SharedMap.__new__(SharedMap)
+        new._buckets = tuple(buckets)
+        new._size = size
+        return new
+
+
+# Read-only view of the auction that every session renders from. A change never
+# edits a published snapshot; it builds the next one and bumps the version, so
+# sessions can keep a reference without copying and without locking. The player
+# maps are SharedMaps, so the next snapshot reuses all but the few buckets a
+# change touches.
+#
+# player_rows maps player id -> the player's row (a dict of VERSIONED_PLAYER_COLUMNS: the
+# version is the one stored, which modify and delete check hasn't moved on), and
+# player_ids_by_name maps the exact (stripped, case-sensitive) player name -> id.
+# "Virat" and "Virat K" are different keys; a name never matches by prefix. New
+# names must be unique, and if an older database holds the same name twice the
+# name maps to the earliest-added player, as the form's name lookup always did.
+#
+# team_squads maps team -> SharedMap of player id -> row for the team's players,
+# and unsold_players does the same for the players nobody bought. The rows are
+# the same dicts as in player_rows and, like the snapshot, never modified.
+#
+# team_stats maps team -> TeamStats, kept up to date by each change rather than
+# recomputed from the squad on every read.
+AuctionSnapshot = namedtuple(
+    "AuctionSnapshot",
+    ["version", "player_rows", "player_ids_by_name", "team_budgets", "team_squads", "unsold_players", "team_stats"],
+)
+
+# Running totals for one team's squad; categories and nationalities map each value to a player count
+TeamStats = namedtuple("TeamStats", ["total_rating", "total_spend", "num_players", "categories", "nationalities"])
+
+# Columns of the squad tables (a squad holds the players' rows, which also carry team_bought)
+SQUAD_COLUMNS = ["id", "name", "sold_amount", "rating", "category", "nationality"]
+
+# Function to sort player rows (id -> row) into every team's squad and the unsold players in a
+# single pass; returns (team_squads, unsold_players). The rows themselves are shared, not copied.
+def build_team_squads(player_rows, teams):
+    groups = {team: [] for team in teams}
+    groups["Unsold"] = []
+    for player_id, player in player_rows.items():
+        group = groups.get(player["team_bought"])
+        if group is not None:
+            group.append((player_id, player))
+    unsold_players = SharedMap(groups.pop("Unsold"))
+    return {team: SharedMap(group) for team, group in groups.items()}, unsold_players
+
+# Function to total up a squad's rating, spend, category and nationality counts
+def squad_stats(squad):
+    players = list(squad.values())
+    return TeamStats(
+        sum(int(player["rating"]) for player in players),
+        sum(int(player["sold_amount"]) for player in players),
+        len(players),
+        MappingProxyType(Counter(player["category"] for player in players)),
+        MappingProxyType(Counter(player["nationality"] for player in players)),
+    )
+
+# Function to return a team's stats with one squad entry added (sign=1) or removed (sign=-1).
+# Only the two small count maps are copied, so this costs the same however big the squad is.
+def update_team_stats(stats, player, sign):
+    categories = Counter(stats.categories)
+    categories[player["category"]] += sign
+    nationalities = Counter(stats.nationalities)
+    nationalities[player["nationality"]] += sign
+    return TeamStats(
+        stats.total_rating + sign * int(player["rating"]),
+        stats.total_spend + sign * int(player["sold_amount"]),
+        stats.num_players + sign,
+        MappingProxyType(+categories),  # unary + drops counts that fell to zero
+        MappingProxyType(+nationalities),
+    )
+
+# Function to get the squads and unsold players with some players' rows moved. Each move is
+# (before, after): the player's row before the change (None for a new player) and after it
+# (None for a deleted player). Only the squads involved are changed.
+def move_players(team_squads, unsold_players, moves):
+    removals = {}
+    updates = {}
+    for before, after in moves:
+        if before is not None:
+            removals.setdefault(before["team_bought"], []).append(before["id"])
+        if after is not None:
+            updates.setdefault(after["team_bought"], {})[after["id"]] = after
+    team_squads = dict(team_squads)
+    for team in removals.keys() | updates.keys():
+        if team == "Unsold":
+            unsold_players = unsold_players.changed(updates.get(team), removals.get(team, ()))
+        else:
+            team_squads[team] = team_squads[team].changed(updates.get(team), removals.get(team, ()))
+    return team_squads, unsold_players
+
+# Function to convert a player row (a stored dict or a pandas row) to a dict of plain values
+def player_dict(player):
+    return {
+        column: int(player[column]) if column in ("id", "sold_amount", "rating") else player[column]
+        for column in PLAYER_COLUMNS
+    }
+
+# One entry of an operator's undo/redo history: the player's row before and after the change
+# (None before an add and after a delete). Undo takes the row from after back to before,
+# redo from before to after.
+HistoryEntry = namedtuple("HistoryEntry", ["description", "before", "after"])
+
+# One admin operator's undo and redo stacks of HistoryEntry, newest last
+OperatorHistory = namedtuple("OperatorHistory", ["undo_stack", "redo_stack"])
+
+# Function to build the id -> row and name -> id maps for a players DataFrame
+def build_player_index(players):
+    # tolist gives plain Python values, as player_dict would; a dict display per row is the
+    # quickest way to build 100k rows
+    ids, names, sold_amounts, ratings, teams, categories, nationalities, versions = (
+        players[column].tolist() for column in VERSIONED_PLAYER_COLUMNS
+    )
+    player_rows = SharedMap(
+        (player_id, {"id": player_id, "name": name, "sold_amount": sold_amount, "rating": rating,
+                     "team_bought": team, "category": category, "nationality": nationality, "version": version})
+        for player_id, name, sold_amount, rating, team, category, nationality, version
+        in zip(ids, names, sold_amounts, ratings, teams, categories, nationalities, versions)
+    )
+    # Walk backwards so the earliest-added player wins when a name is duplicated
+    player_ids_by_name = SharedMap(zip(reversed(names), reversed(ids)))
+    return player_rows, player_ids_by_name
+
+# Function to build a complete snapshot from the players DataFrame and the team budgets
+def build_snapshot(version, players, team_budgets):
+    player_rows, player_ids_by_name = build_player_index(players)
+    team_squads, unsold_players = build_team_squads(player_rows, team_budgets)
+    return AuctionSnapshot(
+        version,
+        player_rows,
+        player_ids_by_name,
+        MappingProxyType(team_budgets),
+        MappingProxyType(team_squads),
+        unsold_players,
+        MappingProxyType({team: squad_stats(squad) for team, squad in team_squads.items()}),
+    )
+
+
+# One instance per process (see get_auction_state in app.py). Every write goes
+# through the lock, commits to the storage backend (see storage.py) first, then
+# publishes a new snapshot and announces the change on the feed.
+class AuctionState:
+    # Sessions poll refresh_if_changed every second or so; this caps the database checks
+    # for the whole process no matter how many sessions are polling
+    CHANGE_CHECK_INTERVAL = 0.5
+
+    # Player changes each operator can undo; older ones drop off the bottom of their history
+    HISTORY_LIMIT = 100
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.lock = threading.RLock()
+        self.snapshot = None
+        self.feed = ChangeFeed()
+        # operator -> OperatorHistory: each admin session undoes only the changes it made
+        self.histories = {}
+        self._data_version = None
+        self._duplicate_names = set()
+        self._last_change_check = 0.0
+        self.reload()
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    # Re-read the players and budgets from storage and publish them
+    def reload(self):
+        with self.lock:
+            # Take the marker before loading: a commit from elsewhere that lands during the load
+            # then still counts as unseen, and the next refresh_if_changed picks it up
+            data_version = self._read_data_version()
+            players, team_budgets = self.storage.load()
+            self.snapshot = build_snapshot(self._next_version(), players, team_budgets)
+            # Names an older database holds more than once (new names are unique)
+            self._duplicate_names = {name for name, count in Counter(players["name"].tolist()).items() if count > 1}
+            self._data_version = data_version
+            # Subscribers can't be sent a delta for a full reload, so they refetch the exports
+            self.feed.publish("reset", {"version": self.version})
+
+    # Changes when something other than this state writes to the storage (for SQLite, another
+    # process or the sqlite3 shell); this state's own writes are already in the published snapshot
+    def _read_data_version(self):
+        return self.storage.data_version()
+
+    # Reload only if someone else has written to the storage since the last load; returns True if it did
+    def refresh_if_changed(self):
+        now = time.monotonic()
+        if now - self._last_change_check < self.CHANGE_CHECK_INTERVAL:
+            return False
+        with self.lock:
+            self._last_change_check = now
+            if self._read_data_version() == self._data_version:
+                return False
+            self.reload()
+            return True
+
+    def _next_version(self):
+        return self.snapshot.version + 1 if self.snapshot is not None else 1
+
+    # Publish the next snapshot with some fields replaced (plain dicts are frozen on the way in)
+    def _publish(self, **changes):
+        for field, value in changes.items():
+            if isinstance(value, dict):
+                changes[field] = MappingProxyType(value)
+        self.snapshot = self.snapshot._replace(version=self._next_version(), **changes)
+
+    # Look up a player's id by exact name; returns None if there is no such player
+    def find_player_id(self, name):
+        return self.snapshot.player_ids_by_name.get(name)
+
+    # Look up a player's row by id; returns None if there is no such player
+    def _find_player(self, player_id):
+        return self.snapshot.player_rows.get(player_id)
+
+    # Function to get the name index once player_id no longer goes by name. If an older database
+    # had the name twice, it passes to the earliest-added player still holding it (a scan, but
+    # only ever for those names).
+    def _release_name(self, player_ids_by_name, name, player_id):
+        if player_ids_by_name.get(name) != player_id:
+            return player_ids_by_name
+        if name in self._duplicate_names:
+            others = [other for other, row in self.snapshot.player_rows.items() if row["name"] == name and other != player_id]
+            if others:
+                return player_ids_by_name.changed({name: min(others)})
+        return player_ids_by_name.changed(removals=[name])
+
+    # Add a new player; returns the stored player dict, or None if the name is already taken.
+    # Raises WriteConflict (after reloading) if another operator has spent the team's budget
+    # or the team no longer exists.
+    # operator is the admin session making the change, whose undo history it goes on; changes
+    # without one (lot sales, undo/redo's own steps) aren't recorded. player_id is only given
+    # by undo/redo restoring a deleted player.
+    def add_player(self, name, sold_amount, rating, team_bought, category, nationality, player_id=None, operator=None):
+        with self.lock:
+            snapshot = self.snapshot
+            if name in snapshot.player_ids_by_name:
+                return None
+            new_entry = {
+                "id": player_id,  # Allocated by the storage on insert unless restoring a player
+                "name": name,
+                "sold_amount": sold_amount if team_bought != "Unsold" else 0,  # Set sold amount to 0 if unsold
+                "rating": rating,
+                "team_bought": team_bought,
+                "category": category,
+                "nationality": nationality,
+                "version": 0,
+            }
+            budget_changes = {}
+            if team_bought != "Unsold":
+                budget_changes[team_bought] = -sold_amount
+
+            # Commit the player row and the team's budget together before publishing
+            try:
+                new_entry["id"], budget_updates = self.storage.record_player_add(new_entry, budget_changes)
+            except sqlite3.IntegrityError as error:
+                # Another process added the name (or deleted the team) since our last load
+                conflict = self._add_conflict([new_entry], error)
+                if conflict is None:
+                    return None
+                raise conflict
+            except WriteConflict:
+                self.reload()
+                raise
+
+            self._publish_sales(snapshot, [new_entry], budget_updates)
+            if operator is not None:
+                self._remember(operator, f"add {name}", None, new_entry)
+            return new_entry
+
+    # Add several new players at once (a group commit: one transaction for the whole batch);
+    # each sale is a dict of the add_player arguments. Returns the stored player dicts, in order,
+    # or None if any name is taken. Raises WriteConflict (after reloading) if any team can no
+    # longer afford its purchases or no longer exists; nothing in the batch is then saved.
+    # operator is as for add_player.
+    def add_players(self, sales, operator=None):
+        with self.lock:
+            snapshot = self.snapshot
+            names = [sale["name"] for sale in sales]
+            if len(set(names)) != len(names) or any(name in snapshot.player_ids_by_name for name in names):
+                return None
+            batch = []
+            for sale in sales:
+                entry = {
+                    "id": None,
+                    "name": sale["name"],
+                    "sold_amount": sale["sold_amount"] if sale["team_bought"] != "Unsold" else 0,
+                    "rating": sale["rating"],
+                    "team_bought": sale["team_bought"],
+                    "category": sale["category"],
+                    "nationality": sale["nationality"],
+                    "version": 0,
+                }
+                batch.append((entry, {} if entry["team_bought"] == "Unsold" else {entry["team_bought"]: -entry["sold_amount"]}))
+
+            try:
+                player_ids, budget_updates = self.storage.record_player_adds(batch)
+            except sqlite3.IntegrityError as error:
+                conflict = self._add_conflict([entry for entry, _ in batch], error)
+                if conflict is None:
+                    return None
+                raise conflict
+            except WriteConflict:
+                self.reload()
+                raise
+
+            entries = [entry for entry, _ in batch]
+            for entry, player_id in zip(entries, player_ids):
+                entry["id"] = player_id
+            self._publish_sales(snapshot, entries, budget_updates)
+            if operator is not None:
+                for entry in entries:
+                    self._remember(operator, f"add {entry['name']}", None, entry)
+            return entries
+
+    # Function to publish the snapshot with newly stored players added, and announce each sale
+    def _publish_sales(self, snapshot, entries, budget_updates):
+        team_squads, unsold_players = move_players(
+            snapshot.team_squads, snapshot.unsold_players, [(None, entry) for entry in entries],
+        )
+        team_stats = dict(snapshot.team_stats)
+        for entry in entries:
+            if entry["team_bought"] != "Unsold":
+                team_stats[entry["team_bought"]] = update_team_stats(team_stats[entry["team_bought"]], entry, 1)
+        self._publish(
+            player_rows=snapshot.player_rows.changed({entry["id"]: entry for entry in entries}),
+            player_ids_by_name=snapshot.player_ids_by_name.changed({entry["name"]: entry["id"] for entry in entries}),
+            team_budgets={**snapshot.team_budgets, **budget_updates},
+            team_squads=team_squads,
+            unsold_players=unsold_players,
+            team_stats=team_stats,
+        )
+        for entry in entries:
+            team = entry["team_bought"]
+            budgets = {team: budget_updates[team]} if team in budget_updates else {}
+            self.feed.publish("sale", {"version": self.version, "player": entry, "budgets": budgets})
+
+    # Modify an existing player; returns the stored player dict, or None if the player is gone.
+    # Raises WriteConflict (after reloading) if another operator changed the player or spent the budget first.
+    # operator is as for add_player.
+    def modify_player(self, player_id, name, sold_amount, rating, team_bought, category, nationality, operator=None):
+        with self.lock:
+            snapshot = self.snapshot
+            player = self._find_player(player_id)
+            if player is None:
+                return None
+            original_team = player["team_bought"]
+            old_sold_amount = int(player["sold_amount"])
+
+            # Refund the original team and charge the new one (the same team nets out to the price difference)
+            budget_changes = {}
+            if original_team != "Unsold":
+                budget_changes[original_team] = old_sold_amount
+            if team_bought != "Unsold":
+                budget_changes[team_bought] = budget_changes.get(team_bought, 0) - sold_amount
+
+            updated_player = {
+                "id": player_id,
+                "name": name,
+                "sold_amount": sold_amount if team_bought != "Unsold" else 0,
+                "rating": rating,
+                "team_bought": team_bought,
+                "category": category,
+                "nationality": nationality,
+                "version": int(player["version"]) + 1,  # As the storage bumps it
+            }
+
+            # Commit the player row and every touched team budget together before publishing
+            try:
+                budget_updates = self.storage.record_player_modify(updated_player, player, budget_changes)
+            except WriteConflict:
+                self.reload()
+                raise
+
+            player_ids_by_name = snapshot.player_ids_by_name
+            if name != player["name"]:
+                player_ids_by_name = self._release_name(player_ids_by_name, player["name"], player_id)
+                if name not in player_ids_by_name:
+                    player_ids_by_name = player_ids_by_name.changed({name: player_id})
+
+            # Take the old values out of the original team's stats and put the new ones into the new team's
+            team_stats = dict(snapshot.team_stats)
+            if original_team != "Unsold":
+                team_stats[original_team] = update_team_stats(team_stats[original_team], player, -1)
+            if team_bought != "Unsold":
+                team_stats[team_bought] = update_team_stats(team_stats[team_bought], updated_player, 1)
+
+            # Move the player's entry from the original team's squad (or the unsold players) to the new one's
+            team_squads, unsold_players = move_players(
+                snapshot.team_squads, snapshot.unsold_players, [(player, updated_player)],
+            )
+
+            self._publish(
+                player_rows=snapshot.player_rows.changed({player_id: updated_player}),
+                player_ids_by_name=player_ids_by_name,
+                team_budgets={**snapshot.team_budgets, **budget_updates},
+                team_squads=team_squads,
+                unsold_players=unsold_players,
+                team_stats=team_stats,
+            )
+            self.feed.publish("modify", {
+                "version": self.version,
+                "player": updated_player,
+                "previous_team": original_team,
+                "budgets": budget_updates,
+            })
+            if operator is not None:
+                self._remember(operator, f"modify {name}", player, updated_player)
+            return updated_player
+
+    # Delete a player and refund their team; returns True if the player existed.
+    # Raises WriteConflict (after reloading) if another operator changed the player first.
+    # operator is as for add_player.
+    def delete_player(self, player_id, operator=None):
+        with self.lock:
+            snapshot = self.snapshot
+            player = self._find_player(player_id)
+            if player is None:
+                return False
+            original_team = player["team_bought"]
+
+            budget_changes = {}
+            if original_team != "Unsold":
+                budget_changes[original_team] = int(player["sold_amount"])
+
+            # Commit the row delete and the refund together before publishing
+            try:
+                budget_updates = self.storage.record_player_delete(player_id, player, budget_changes)
+            except WriteConflict:
+                self.reload()
+                raise
+
+            team_squads, unsold_players = move_players(snapshot.team_squads, snapshot.unsold_players, [(player, None)])
+            team_stats = dict(snapshot.team_stats)
+            if original_team != "Unsold":
+                team_stats[original_team] = update_team_stats(team_stats[original_team], player, -1)
+            self._publish(
+                player_rows=snapshot.player_rows.changed(removals=[player_id]),
+                player_ids_by_name=self._release_name(snapshot.player_ids_by_name, player["name"], player_id),
+                team_budgets={**snapshot.team_budgets, **budget_updates},
+                team_squads=team_squads,
+                unsold_players=unsold_players,
+                team_stats=team_stats,
+            )
+            self.feed.publish("delete", {
+                "version": self.version,
+                "player_id": player_id,
+                "team": original_team,
+                "budgets": budget_updates,
+            })
+            if operator is not None:
+                self._remember(operator, f"delete {player['name']}", player, None)
+            return True
+
+    # Add a new team with an empty squad
+    def add_team(self, team, budget):
+        with self.lock:
+            snapshot = self.snapshot
+            self.storage.add_team(team, budget)
+            self._publish(
+                team_budgets={**snapshot.team_budgets, team: budget},
+                team_squads={**snapshot.team_squads, team: SharedMap()},
+                team_stats={**snapshot.team_stats, team: squad_stats(SharedMap())},
+            )
+            self.feed.publish("team", {"version": self.version, "team": team, "budget": budget})
+
+    # Import many players at once (rows from bulk_import.read_players_csv). The file is validated
+    # against the current snapshot and, only if every row is valid, written in one transaction.
+    # Returns (players, errors): the validated players, and the problems found (empty if imported).
+    # Raises WriteConflict if another operator spent a team's budget or added a name meanwhile.
+    def import_players(self, frame):
+        with self.lock:
+            snapshot = self.snapshot
+            players, errors = validate_players(frame, snapshot.team_budgets, snapshot.player_ids_by_name)
+            if not errors.empty:
+                return players, errors
+            try:
+                self.storage.record_player_import(players.to_dict("records"), import_budget_changes(players))
+            except sqlite3.IntegrityError as error:
+                conflict = self._add_conflict(players.to_dict("records"), error)
+                raise conflict or WriteConflict("A player in the file was added by another operator meanwhile.")
+            except WriteConflict:
+                self.reload()
+                raise
+            # Too many rows for a delta; rebuild from the tables (publishes a reset to subscribers)
+            self.reload()
+            return players, errors
+
+    # Delete every player and team (the players in the undo histories are gone, so they are cleared)
+    def delete_all(self):
+        with self.lock:
+            self.storage.delete_all()
+            self.histories.clear()
+            self._duplicate_names = set()
+            self.snapshot = build_snapshot(self._next_version(), pd.DataFrame(columns=VERSIONED_PLAYER_COLUMNS), {})
+            self.feed.publish("reset", {"version": self.version})
+
+    # Function to work out why adding players hit an IntegrityError, after reloading: returns None
+    # if one of the names has been taken meanwhile, otherwise the WriteConflict to raise (a team
+    # deleted by another process fails the team foreign key, not the unique name)
+    def _add_conflict(self, players, error):
+        self.reload()
+        snapshot = self.snapshot
+        if any(player["name"] in snapshot.player_ids_by_name for player in players):
+            return None
+        missing = sorted({
+            player["team_bought"] for player in players
+            if player["team_bought"] != "Unsold" and player["team_bought"] not in snapshot.team_budgets
+        })
+        if missing:
+            return WriteConflict(f"Team '{missing[0]}' no longer exists; it was removed by another operator.")
+        return WriteConflict(f"The change couldn't be saved ({error}); the latest data has been reloaded.")
+
+    # Function to get an operator's history, starting an empty one the first time
+    def _history(self, operator):
+        history = self.histories.get(operator)
+        if history is None:
+            history = OperatorHistory(deque(maxlen=self.HISTORY_LIMIT), deque(maxlen=self.HISTORY_LIMIT))
+            self.histories[operator] = history
+        return history
+
+    # Function to get the change an operator's undo would take back and the one their redo
+    # would make again, each None if there is none
+    def history_heads(self, operator):
+        with self.lock:
+            history = self._history(operator)
+            return (
+                history.undo_stack[-1] if history.undo_stack else None,
+                history.redo_stack[-1] if history.redo_stack else None,
+            )
+
+    # Function to push a player change onto an operator's undo history; a new change ends their redo
+    def _remember(self, operator, description, before, after):
+        history = self._history(operator)
+        history.undo_stack.append(HistoryEntry(
+            description,
+            None if before is None else player_dict(before),
+            None if after is None else player_dict(after),
+        ))
+        history.redo_stack.clear()
+
+    # Undo the operator's latest player change; returns its description, or None if there is
+    # nothing to undo. The inverse (delete an added player, put back a modified player's old row, re-add a
+    # deleted player under its old id, with the budgets moved back) goes through the same
+    # path as the admin form, so it commits as one small transaction. Raises WriteConflict if
+    # the player has changed since; that change is then dropped from the history.
+    def undo(self, operator):
+        with self.lock:
+            history = self._history(operator)
+            if not history.undo_stack:
+                return None
+            entry = history.undo_stack.pop()
+            self._move_player(entry.after, entry.before)
+            history.redo_stack.append(entry)
+            return entry.description
+
+    # Redo the operator's latest undone player change; returns its description, or None if there
+    # is nothing to redo. Raises WriteConflict as undo does.
+    def redo(self, operator):
+        with self.lock:
+            history = self._history(operator)
+            if not history.redo_stack:
+                return None
+            entry = history.redo_stack.pop()
+            self._move_player(entry.before, entry.after)
+            history.undo_stack.append(entry)
+            return entry.description
+
+    # Function to take a player from one row (None: no such player) to another, provided the
+    # player still has the first row
+    def _move_player(self, current, target):
+        row = current if current is not None else target
+        found = self._find_player(row["id"])
+        if (None if found is None else player_dict(found)) != current:
+            raise WriteConflict(f"Player '{row['name']}' was changed by another operator since.")
+        if target is not None and self.snapshot.player_ids_by_name.get(target["name"], target["id"]) != target["id"]:
+            raise WriteConflict(f"Player name '{target['name']}' has been taken by another player since.")
+        if target is None:
+            self.delete_player(row["id"])
+        elif current is None:
+            restored = self.add_player(
+                target["name"], target["sold_amount"], target["rating"], target["team_bought"],
+                target["category"], target["nationality"], player_id=target["id"],
+            )
+            if restored is None:
+                raise WriteConflict(f"Player name '{target['name']}' has been taken by another player since.")
+        else:
+            self.modify_player(
+                target["id"], target["name"], target["sold_amount"], target["rating"], target["team_bought"],
+                target["category"], target["nationality"],
+            )
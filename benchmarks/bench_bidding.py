@@ -0,0 +1,115 @@
+# Bid intake of the live bidding engine (bidding.py) with many teams bidding at once.
+#
+# A lot is opened on an AuctionState backed by a fresh SQLite database, then:
+#
+#   paced     one thread per team, together bidding --rate times a second for --duration
+#             seconds, each bid the next increment the team sees (refused if another
+#             team got to that amount first, or the team already holds the bid)
+#   capacity  a single thread cycling through the teams as fast as it can, for the
+#             engine's ceiling
+#
+# Reports accepted and refused bids per second, place_bid latency percentiles, and the
+# time to close the lot (the one write: the sale). Run from the repository root:
+#
+#     python -m benchmarks.bench_bidding
+#     python -m benchmarks.bench_bidding --teams 50 --rate 1000 --duration 10
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from auction_db import init_db
+from auction_state import AuctionState
+from bidding import BiddingEngine, BidRejected, next_bid
+from storage import SQLiteStorage
+
+
+# Function to bid for team every interval seconds until stop is set, recording each call's latency
+def paced_bidder(engine, team, interval, stop, latencies, counts):
+    accepted = refused = 0
+    next_time = time.perf_counter()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            engine.place_bid(team, next_bid(engine.lot))
+            accepted += 1
+        except BidRejected:
+            refused += 1
+        latencies.append(time.perf_counter() - start)
+        next_time += interval
+        time.sleep(max(0.0, next_time - time.perf_counter()))
+    counts.append((accepted, refused))
+
+# Function to place bids from each team in turn for duration seconds; returns (bids, seconds)
+def capacity(engine, teams, duration):
+    bids = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for team in teams:
+            engine.place_bid(team)
+        bids += len(teams)
+    return bids, time.perf_counter() - start
+
+# Function to open a lot on a fresh database with the given teams
+def open_engine(path, teams, duration):
+    storage = SQLiteStorage(init_db(path))
+    for team in teams:
+        storage.add_team(team, 10 ** 15)
+    engine = BiddingEngine(AuctionState(storage))
+    engine.open_lot("LOT PLAYER", 90, "Batter", "Indian", 20, duration=duration + 60)
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time bid intake with many teams bidding on one lot.")
+    parser.add_argument("--teams", type=int, default=10, help="number of teams bidding")
+    parser.add_argument("--rate", type=float, default=500.0, help="paced bids per second, all teams together")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of bidding for each run")
+    args = parser.parse_args()
+    teams = [f"TEAM {i}" for i in range(args.teams)]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = open_engine(os.path.join(tmpdir, "paced.db"), teams, args.duration)
+        stop = threading.Event()
+        latencies, counts = [], []
+        interval = args.teams / args.rate
+        threads = [
+            threading.Thread(target=paced_bidder, args=(engine, team, interval, stop, latencies, counts))
+            for team in teams
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        close_start = time.perf_counter()
+        lot = engine.close_lot()
+        close_ms = (time.perf_counter() - close_start) * 1000
+        assert lot.status == "sold" and engine.state.find_player_id("LOT PLAYER") is not None
+        engine.state.storage.close()
+
+        engine = open_engine(os.path.join(tmpdir, "capacity.db"), teams, args.duration)
+        capacity_bids, capacity_seconds = capacity(engine, teams, args.duration)
+        engine.close_lot()
+        engine.state.storage.close()
+
+    accepted = sum(a for a, _ in counts)
+    refused = sum(r for _, r in counts)
+    latencies_us = sorted(latency * 10 ** 6 for latency in latencies)
+    print(f"teams               {args.teams}")
+    print(f"paced: accepted     {accepted} ({accepted / elapsed:,.0f}/s)")
+    print(f"paced: refused      {refused} ({refused / elapsed:,.0f}/s, beaten to the amount or already holding the bid)")
+    print(f"place_bid latency   p50 {statistics.median(latencies_us):.1f} us, "
+          f"p99 {latencies_us[int(len(latencies_us) * 0.99)]:.1f} us, max {latencies_us[-1]:.1f} us")
+    print(f"close (sale write)  {close_ms:.2f} ms, sold for {lot.high_bid.amount} lakhs to {lot.high_bid.team}")
+    print(f"capacity            {capacity_bids / capacity_seconds:,.0f} bids/s from one thread")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Fan-out of the /events change feed to many local subscribers.
+#
+# Starts the export server with a ChangeFeed, connects SUBSCRIBERS raw sockets
+# to /events, then publishes EVENTS sale events one at a time and measures how
+# long each event takes to reach every subscriber. Run from the repository root:
+#
+#     python -m benchmarks.bench_feed
+import resource
+import selectors
+import socket
+import statistics
+import time
+
+from change_feed import ChangeFeed
+from export_server import SQLiteExportSource, start_export_server
+
+SUBSCRIBERS = 500
+EVENTS = 50
+PORT = 8765
+
+
+# Function to open one /events subscription and wait for the stream to start
+def subscribe():
+    sock = socket.create_connection(("127.0.0.1", PORT))
+    sock.sendall(b"GET /events HTTP/1.0\r\nHost: localhost\r\n\r\n")
+    received = b""
+    while b"retry:" not in received:
+        received += sock.recv(4096)
+    sock.setblocking(False)
+    return sock
+
+
+def main():
+    # Each subscriber needs a socket on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, 4 * SUBSCRIBERS)), hard))
+
+    feed = ChangeFeed()
+    httpd = start_export_server(SQLiteExportSource(":memory:"), port=PORT, feed=feed)
+    start = time.perf_counter()
+    sockets = [subscribe() for _ in range(SUBSCRIBERS)]
+    print(f"{SUBSCRIBERS} subscribers connected in {time.perf_counter() - start:.2f} s")
+
+    selector = selectors.DefaultSelector()
+    for sock in sockets:
+        selector.register(sock, selectors.EVENT_READ)
+
+    latencies = []  # per subscriber per event, ms
+    fan_out = []  # time for one event to reach every subscriber, ms
+    for i in range(EVENTS):
+        marker = f"id: {feed.event_id(feed.last_id + 1)}\n".encode()
+        pending = set(sockets)
+        buffers = {sock: b"" for sock in sockets}
+        published = time.perf_counter()
+        feed.publish("sale", {"version": i, "player": {"id": i, "name": f"PLAYER {i}", "team_bought": "CSK"}, "budgets": {"CSK": 9000 - i}})
+        while pending:
+            for key, _ in selector.select(timeout=5):
+                sock = key.fileobj
+                buffers[sock] += sock.recv(65536)
+                if sock in pending and marker in buffers[sock]:
+                    pending.discard(sock)
+                    latencies.append((time.perf_counter() - published) * 1000)
+        fan_out.append((time.perf_counter() - published) * 1000)
+
+    latencies.sort()
+    print(f"{EVENTS} events x {SUBSCRIBERS} subscribers")
+    print(f"  delivery latency  p50 {statistics.median(latencies):.2f} ms"
+          f"  p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms  max {latencies[-1]:.2f} ms")
+    print(f"  full fan-out      p50 {statistics.median(fan_out):.2f} ms  max {max(fan_out):.2f} ms")
+    print(f"  throughput        {EVENTS * SUBSCRIBERS / (sum(fan_out) / 1000):.0f} deliveries/s")
+
+    for sock in sockets:
+        sock.close()
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Bulk import throughput from a players.csv-shaped file.
+#
+# Writes a CSV of n players, then times reading it, validating it and writing it in
+# one transaction (AuctionState.import_players), against adding the same players one
+# at a time through the admin panel's path (AuctionState.add_player). The one-at-a-time
+# path is only run up to ONE_BY_ONE_MAX rows. Run from the repository root:
+#
+#     python -m benchmarks.bench_import
+import os
+import tempfile
+import time
+
+from auction_db import init_db
+from auction_state import AuctionState
+from benchmarks.bench_writes import TEAMS, make_players
+from bulk_import import CSV_COLUMNS, read_players_csv
+from storage import SQLiteStorage
+
+SIZES = [1000, 10000, 100000]
+ONE_BY_ONE_MAX = 10000
+
+
+# Function to write n players to a CSV with the players.csv headers
+def write_players_csv(path, n):
+    players = make_players(n).drop(columns="id")
+    players["sold_amount"] = 1
+    players.rename(columns={column: header for header, column in CSV_COLUMNS.items()}).to_csv(path, index=False)
+
+# Function to open an AuctionState on a fresh database with the teams and no players
+def empty_state(path):
+    conn = init_db(path)
+    with conn:
+        conn.executemany("INSERT INTO teams VALUES (?, ?)", [(team, 9000000) for team in TEAMS])
+    return AuctionState(SQLiteStorage(conn))
+
+# Function to time the bulk path and (for small files) the one-at-a-time path; returns rows/s for each
+def run(n, tmpdir):
+    csv_path = os.path.join(tmpdir, f"players_{n}.csv")
+    write_players_csv(csv_path, n)
+    results = {}
+
+    state = empty_state(os.path.join(tmpdir, f"bulk_{n}.db"))
+    start = time.perf_counter()
+    players, errors = state.import_players(read_players_csv(csv_path))
+    elapsed = time.perf_counter() - start
+    assert errors.empty and len(state.snapshot.player_rows) == n
+    results["bulk"] = n / elapsed
+    state.storage.close()
+
+    if n <= ONE_BY_ONE_MAX:
+        state = empty_state(os.path.join(tmpdir, f"rows_{n}.db"))
+        start = time.perf_counter()
+        for player in read_players_csv(csv_path).itertuples(index=False):
+            state.add_player(player.name, int(player.sold_amount), int(player.rating), player.team_bought, player.category, player.nationality)
+        elapsed = time.perf_counter() - start
+        results["one_by_one"] = n / elapsed
+        state.storage.close()
+    return results
+
+
+def main():
+    print(f"{'players':>8} {'bulk import (rows/s)':>22} {'one at a time (rows/s)':>24}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in SIZES:
+            results = run(n, tmpdir)
+            one_by_one = f"{results['one_by_one']:>24,.0f}" if "one_by_one" in results else f"{'-':>24}"
+            print(f"{n:>8} {results['bulk']:>22,.0f} {one_by_one}")
+
+
+if __name__ == "__main__":
+    main()
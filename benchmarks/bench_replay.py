@@ -0,0 +1,89 @@
+# Replay throughput of the append-only event log (AppendOnlyFileStorage in storage.py).
+#
+# For each log length an event log is written through the storage's own methods: the
+# teams, a pool of POOL sales, then corrections to that pool for the rest of the log
+# (modifies, with every tenth a delete and re-add). The state stays at POOL players
+# however long the log grows, as in an auction. The log is then opened two ways:
+#
+#   full replay      no snapshot, every event replayed (events/s)
+#   snapshot + tail  the latest snapshot loaded and only the TAIL events after it replayed
+#
+# along with the time to write that snapshot. Run from the repository root:
+#
+#     python -m benchmarks.bench_replay
+import os
+import tempfile
+import time
+
+from benchmarks.bench_writes import TEAMS
+from storage import AppendOnlyFileStorage
+
+SIZES = [10000, 100000, 1000000]
+POOL = 1000
+TAIL = 1000
+
+
+# Function to make the player dict for sale i of the pool
+def make_player(i, sold_amount):
+    return {"name": f"PLAYER {i}", "sold_amount": sold_amount, "rating": 80, "team_bought": TEAMS[i % len(TEAMS)],
+            "category": "Batter", "nationality": "Indian"}
+
+# Function to write a log of n events
+def write_log(path, n):
+    storage = AppendOnlyFileStorage(path, snapshot_every=float("inf"))
+    for team in TEAMS:
+        storage.add_team(team, 10 ** 9)
+    ids = []
+    for i in range(POOL):
+        player = make_player(i, 100)
+        ids.append(storage.record_player_add(player, {player["team_bought"]: -100})[0])
+    events = len(TEAMS) + POOL
+    while events < n:
+        i = events % POOL
+        previous = storage.players[ids[i]]  # The row as stored, with its version
+        team = previous["team_bought"]
+        if events % 10 == 0:
+            storage.record_player_delete(ids[i], previous, {team: 100})
+            ids[i] = storage.record_player_add(make_player(i, 100), {team: -100})[0]
+            events += 2
+        else:
+            storage.record_player_modify({**previous, "rating": 80 + events % 20}, previous, {})
+            events += 1
+    storage.close()
+    return events
+
+# Function to time opening the log at path (without snapshotting on open); returns (seconds, storage)
+def time_open(path):
+    start = time.perf_counter()
+    storage = AppendOnlyFileStorage(path, snapshot_every=float("inf"))
+    return time.perf_counter() - start, storage
+
+
+def main():
+    print(f"{'events':>8} {'log MB':>7} {'full replay (s)':>16} {'events/s':>10} {'snapshot write (s)':>19} {f'snapshot + {TAIL} (s)':>19}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in SIZES:
+            path = os.path.join(tmpdir, f"events_{n}.jsonl")
+            events = write_log(path, n)
+
+            full, storage = time_open(path)
+            players = len(storage.players)
+
+            # Snapshot now, then append TAIL more events after it
+            start = time.perf_counter()
+            storage.write_snapshot()
+            snapshot_write = time.perf_counter() - start
+            for i in range(TAIL):
+                storage.add_team(f"TEAM {n} {i}", 1)
+            storage.close()
+
+            tail, storage = time_open(path)
+            assert len(storage.players) == players
+            storage.close()
+
+            size = os.path.getsize(path) / 2 ** 20
+            print(f"{events:>8} {size:>7.1f} {full:>16.3f} {events / full:>10,.0f} {snapshot_write:>19.3f} {tail:>19.3f}")
+
+
+if __name__ == "__main__":
+    main()
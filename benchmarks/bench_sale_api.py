@@ -0,0 +1,92 @@
+# Sale intake through the JSON API (sale_api.py) with many operators posting at once.
+#
+# The API is started on a fresh SQLite database (teams with budgets too large to run out),
+# then --clients threads, each on its own keep-alive connection, post one sale per request
+# as fast as the API answers, for --sales sales in all. Run twice:
+#
+#   one by one    batch_size 1: a transaction per sale
+#   group commit  batch_size BATCH_SIZE: everything queued while a commit runs goes in the next
+#
+# Reports sales/s, request latency percentiles, and how many sales went in each commit.
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_sale_api
+#     python -m benchmarks.bench_sale_api --clients 50 --sales 5000
+import argparse
+import http.client
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from auction_db import init_db
+from auction_state import AuctionState
+from benchmarks.bench_writes import TEAMS
+from bidding import BiddingEngine
+from sale_api import BATCH_SIZE, start_sale_api
+from storage import SQLiteStorage
+
+TOKEN = "bench"
+
+
+# Function to post count sales (names prefix-0, prefix-1, ...) over one connection, recording latencies
+def client(port, prefix, count, latencies):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json"}
+    for i in range(count):
+        sale = {"name": f"{prefix}-{i}", "sold_amount": 20, "rating": 80, "team_bought": TEAMS[i % len(TEAMS)],
+                "category": "Batter", "nationality": "Indian"}
+        start = time.perf_counter()
+        conn.request("POST", "/sales", json.dumps(sale), headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        assert response.status == 201, response.status
+    conn.close()
+
+# Function to run the clients against an API with the given batch size; returns
+# (sales/s, latencies, sales per commit)
+def run(path, port, batch_size, clients, sales):
+    storage = SQLiteStorage(init_db(path))
+    for team in TEAMS:
+        storage.add_team(team, 10 ** 12)
+    state = AuctionState(storage)
+    api = start_sale_api(state, BiddingEngine(state), TOKEN, port=port, batch_size=batch_size)
+    latencies = []
+    threads = [
+        threading.Thread(target=client, args=(port, f"C{c}", sales // clients, latencies))
+        for c in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert len(state.snapshot.player_rows) == api.committed_sales == len(latencies)
+    return len(latencies) / elapsed, latencies, api.committed_sales / api.commits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time sale intake through the JSON API with many clients.")
+    parser.add_argument("--clients", type=int, default=20, help="concurrent keep-alive connections")
+    parser.add_argument("--sales", type=int, default=2000, help="sales posted in all, for each run")
+    parser.add_argument("--port", type=int, default=8101, help="first port to serve on (each run takes the next)")
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.sales} sales")
+    print(f"{'':<14} {'sales/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'sales/commit':>13}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i, (label, batch_size) in enumerate([("one by one", 1), ("group commit", BATCH_SIZE)]):
+            rate, latencies, per_commit = run(
+                os.path.join(tmpdir, f"run{i}.db"), args.port + i, batch_size, args.clients, args.sales,
+            )
+            latencies_ms = sorted(latency * 1000 for latency in latencies)
+            print(f"{label:<14} {rate:>9,.0f} {statistics.median(latencies_ms):>9.2f} "
+                  f"{latencies_ms[int(len(latencies_ms) * 0.99)]:>9.2f} {per_commit:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Sales per second through the sale write path.
+#
+# "legacy" is the pre-WAL behaviour: rollback journal, synchronous=FULL and the
+# player row and team budget committed separately. "atomic" is the current
+# init_db connection (WAL, synchronous=NORMAL) with record_player_add putting
+# both rows in one transaction. Run from the repository root:
+#
+#     python -m benchmarks.bench_sales
+import os
+import sqlite3
+import tempfile
+import time
+
+from auction_db import init_db, insert_player, update_team_budget, record_player_add
+
+SALES = 500
+TEAMS = ["CSK", "MI", "RCB", "RR", "SRH"]
+
+
+# Function to build the i-th benchmark sale
+def make_sale(i):
+    return {
+        "id": i + 1,
+        "name": f"PLAYER {i}",
+        "sold_amount": 1,
+        "rating": 80,
+        "team_bought": TEAMS[i % len(TEAMS)],
+        "category": "Batter",
+        "nationality": "Indian",
+    }
+
+
+# Function to open a database using the legacy journal settings
+def legacy_connect(path):
+    init_db(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+# Function to run SALES sales and return sales per second
+def run(mode, path):
+    conn = legacy_connect(path) if mode == "legacy" else init_db(path)
+    with conn:
+        conn.executemany("INSERT INTO teams VALUES (?, ?)", [(team, 10 ** 9) for team in TEAMS])
+    budgets = {team: 10 ** 9 for team in TEAMS}
+    start = time.perf_counter()
+    for i in range(SALES):
+        sale = make_sale(i)
+        team = sale["team_bought"]
+        if mode == "legacy":
+            insert_player(conn, sale)
+            conn.commit()
+            budgets[team] -= sale["sold_amount"]
+            update_team_budget(conn, team, budgets[team])
+            conn.commit()
+        else:
+            record_player_add(conn, sale, {team: -sale["sold_amount"]})
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return SALES / elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for mode in ("legacy", "atomic"):
+            rate = run(mode, os.path.join(tmpdir, f"{mode}.db"))
+            print(f"{mode:>8}: {rate:10.0f} sales/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Squad rebuild time: the old per-team iterrows loop vs build_team_squads (timed together
+# with build_player_index, which makes the player rows the squads are sorted from).
+#
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_squads
+import time
+
+from auction_state import build_player_index, build_team_squads
+from benchmarks.bench_writes import TEAMS, make_players
+
+PLAYERS = 10000
+ROUNDS = 5
+
+
+# The loop init and refresh_data used before build_team_squads: one boolean scan and iterrows per team
+def build_team_squads_iterrows(players, teams):
+    team_squads = {team: [] for team in teams}
+    for team in teams:
+        squad = []
+        team_players = players[players["team_bought"] == team]
+        for _, player in team_players.iterrows():
+            squad.append({
+                "id": player["id"],
+                "name": player["name"],
+                "sold_amount": player["sold_amount"],
+                "rating": player["rating"],
+                "category": player["category"],
+                "nationality": player["nationality"],
+            })
+        team_squads[team] = squad
+    return team_squads
+
+
+# Function to return the best of ROUNDS timings in milliseconds
+def best_time(func, *args):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    players = make_players(PLAYERS).assign(version=0)  # As storage.load gives them, with row versions
+    old = best_time(build_team_squads_iterrows, players, TEAMS)
+    new = best_time(lambda: build_team_squads(build_player_index(players)[0], TEAMS))
+    print(f"{PLAYERS} players, {len(TEAMS)} teams")
+    print(f"  iterrows loop:     {old:8.1f} ms")
+    print(f"  build_team_squads: {new:8.1f} ms  ({old / new:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Sale latency and reload time for each storage backend (see storage.py).
+#
+# For each pool size every backend is seeded with that many players through one bulk
+# import, then timed recording SALES single sales through AuctionState.add_player (the
+# admin form's path) and reloading: reopening the storage and building a new
+# AuctionState from it, as a dashboard restart does (the memory backend has nothing
+# to reopen, so only the state is rebuilt). Run from the repository root:
+#
+#     python -m benchmarks.bench_storage
+import os
+import statistics
+import tempfile
+import time
+
+from auction_db import init_db
+from auction_state import AuctionState
+from benchmarks.bench_writes import TEAMS, make_players
+from storage import SQLiteStorage, AppendOnlyFileStorage, MemoryStorage
+
+SIZES = [1000, 10000, 100000]
+SALES = 50
+RELOADS = 5
+BACKENDS = ["sqlite", "file", "memory"]
+
+
+# Function to open a backend of the given kind in tmpdir (empty the first time)
+def open_backend(backend, tmpdir, n):
+    if backend == "sqlite":
+        return SQLiteStorage(init_db(os.path.join(tmpdir, f"bench_{n}.db")))
+    if backend == "file":
+        return AppendOnlyFileStorage(os.path.join(tmpdir, f"bench_{n}.jsonl"))
+    return MemoryStorage()
+
+# Function to time sales and reloads on one backend with n players; returns median ms for each
+def run(backend, n, tmpdir):
+    storage = open_backend(backend, tmpdir, n)
+    for team in TEAMS:
+        storage.add_team(team, 10 ** 9)
+    storage.record_player_import(make_players(n).drop(columns="id").to_dict("records"), {})
+    state = AuctionState(storage)
+
+    sales = []
+    for i in range(SALES):
+        start = time.perf_counter()
+        state.add_player(f"NEW PLAYER {i}", 500, 85, TEAMS[i % len(TEAMS)], "Batter", "Indian")
+        sales.append((time.perf_counter() - start) * 1000)
+
+    reloads = []
+    for _ in range(RELOADS):
+        start = time.perf_counter()
+        reopened = open_backend(backend, tmpdir, n) if backend != "memory" else storage
+        state = AuctionState(reopened)
+        reloads.append((time.perf_counter() - start) * 1000)
+        assert len(state.snapshot.player_rows) == n + SALES
+        if reopened is not storage:
+            reopened.close()
+    storage.close()
+    return statistics.median(sales), statistics.median(reloads)
+
+
+def main():
+    print(f"{'players':>8} {'backend':>8} {'sale (ms)':>10} {'reload (ms)':>12}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in SIZES:
+            for backend in BACKENDS:
+                sale_ms, reload_ms = run(backend, n, tmpdir)
+                print(f"{n:>8} {backend:>8} {sale_ms:>10.3f} {reload_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# Microbenchmarks for the auction data operations at 100 to 100k players.
+#
+# For each pool size a database file is seeded with that many players spread
+# over the teams, loaded into an AuctionState, and each operation is timed on
+# its own for a number of rounds. Results are written as JSON, by default to
+# benchmarks/results/<commit>.json, and --compare prints the change against an
+# earlier results file. Run from the repository root:
+#
+#     python -m benchmarks.bench_suite
+#     python -m benchmarks.bench_suite --sizes 100 1000 --compare benchmarks/results/abc1234.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+from auction_state import AuctionState, build_team_squads, build_snapshot
+from storage import SQLiteStorage
+from benchmarks.bench_writes import TEAMS, seed_db
+from dashboard_view import build_budget_metrics, build_dashboard_view, build_rankings
+from ticker import build_slider_items, build_slider_html
+
+SIZES = [100, 1000, 10000, 100000]
+ROUNDS = 20
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# Function to time func over rounds calls; setup (if given) runs untimed before each call
+# and its return value is passed to func
+def measure(func, rounds, setup=None):
+    timings = []
+    for i in range(rounds):
+        arg = setup(i) if setup is not None else None
+        start = time.perf_counter()
+        func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "rounds": rounds,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+        "max_ms": max(timings),
+    }
+
+
+# Function to time every operation against a pool of n players
+def bench_size(n, rounds, directory):
+    conn, _ = seed_db(os.path.join(directory, f"bench_{n}.db"), n)
+    results = {}
+
+    results["load"] = measure(lambda _: AuctionState(SQLiteStorage(conn)), min(rounds, 3))
+    state = AuctionState(SQLiteStorage(conn))
+
+    # Writes: each add is undone by a delete afterwards, so the pool stays at n players
+    added = []
+    results["add_player"] = measure(
+        lambda i: added.append(state.add_player(f"BENCH {i}", 1, 80, TEAMS[i % len(TEAMS)], "Batter", "Indian")["id"]),
+        rounds, setup=lambda i: i,
+    )
+    results["modify_player"] = measure(
+        lambda i: state.modify_player(added[i], f"BENCH {i}", 2, 81, TEAMS[(i + 1) % len(TEAMS)], "Bowler", "Foreign"),
+        rounds, setup=lambda i: i,
+    )
+    results["delete_player"] = measure(lambda i: state.delete_player(added[i]), rounds, setup=lambda i: i)
+
+    # Lookups and rebuilds against the current snapshot
+    snapshot = state.snapshot
+    results["find_player_id"] = measure(lambda i: state.find_player_id(f"PLAYER {i * n // rounds + 1}"), rounds, setup=lambda i: i)
+    players, team_budgets = state.storage.load()
+    results["build_team_squads"] = measure(lambda _: build_team_squads(snapshot.player_rows, TEAMS), rounds)
+    results["build_snapshot"] = measure(lambda _: build_snapshot(1, players, team_budgets), rounds)
+    results["reload"] = measure(lambda _: state.reload(), rounds)
+    snapshot = state.snapshot
+    results["rankings"] = measure(lambda _: (build_rankings(snapshot), build_budget_metrics(snapshot)), rounds)
+    results["ticker"] = measure(lambda _: build_slider_html(build_slider_items(snapshot)), rounds)
+    results["dashboard_view"] = measure(lambda _: build_dashboard_view(snapshot), rounds)
+
+    conn.close()
+    return results
+
+# Function to get the current commit for naming and labelling results
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+# Function to print the median of each operation next to an earlier run's
+def print_comparison(results, baseline):
+    print(f"\nCompared with {baseline['commit']} (median ms, ratio > 1 is slower now)")
+    for size, operations in results["sizes"].items():
+        for operation, timing in operations.items():
+            old = baseline["sizes"].get(size, {}).get(operation)
+            if old is None:
+                continue
+            ratio = timing["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+            flag = "  <-- slower" if ratio > 1.25 else ""
+            print(f"{size:>7} {operation:<18} {old['median_ms']:10.3f} -> {timing['median_ms']:10.3f}  {ratio:5.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time auction data operations at several player pool sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="player pool sizes")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="timed calls per operation")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    commit = current_commit()
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "teams": len(TEAMS),
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for n in args.sizes:
+            print(f"{n} players")
+            results["sizes"][str(n)] = operations = bench_size(n, args.rounds, directory)
+            for operation, timing in operations.items():
+                print(f"  {operation:<18} median {timing['median_ms']:10.3f} ms  min {timing['min_ms']:10.3f} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
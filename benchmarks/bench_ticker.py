@@ -0,0 +1,58 @@
+# Ticker payload size and build time: the old 250-slot strip vs ticker.build_slider_html.
+#
+# Run from the repository root:
+#
+#     python -m benchmarks.bench_ticker
+import time
+
+from auction_db import init_db
+from auction_state import AuctionState
+from benchmarks.bench_writes import TEAMS
+from storage import SQLiteStorage
+from ticker import SEPARATOR, build_slider_items, build_slider_html
+
+SIZES = [10, 50, 200, 1000]
+
+
+# The markup app.py sent on every rerun before the ticker was cached
+def old_slider_html(snapshot):
+    slider_items = build_slider_items(snapshot)
+    if not slider_items:
+        slider_content = "No players have been bought yet."
+    else:
+        slider_content = SEPARATOR.join(slider_items[i % len(slider_items)] for i in range(250))
+    return f"""
+    <div class="slider-container">
+        <div class="slider-content">
+            <div class="slider-item">{slider_content}</div>
+        </div>
+    </div>
+    """
+
+
+# Function to build an auction state with n sold players
+def make_state(n):
+    state = AuctionState(SQLiteStorage(init_db(":memory:")))
+    for team in TEAMS:
+        state.add_team(team, 10 ** 9)
+    for i in range(n):
+        state.add_player(f"PLAYER {i}", 100, 80, TEAMS[i % len(TEAMS)], "Batter", "Foreign" if i % 3 else "Indian")
+    return state
+
+
+def main():
+    print(f"{'sold':>6} {'old bytes':>10} {'new bytes':>10} {'old ms':>8} {'new ms':>8}")
+    for n in SIZES:
+        snapshot = make_state(n).snapshot
+        start = time.perf_counter()
+        old = old_slider_html(snapshot).encode()
+        old_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        new = build_slider_html(build_slider_items(snapshot)).encode()
+        new_ms = (time.perf_counter() - start) * 1000
+        print(f"{n:>6} {len(old):>10} {len(new):>10} {old_ms:>8.2f} {new_ms:>8.2f}")
+    print("In the app the new markup is also cached per snapshot version, so a rerun without a change builds nothing.")
+
+
+if __name__ == "__main__":
+    main()
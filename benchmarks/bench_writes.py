@@ -0,0 +1,103 @@
+# Write latency of a single sale as the players table grows.
+#
+# Compares the old full-table rewrite (to_sql if_exists="replace") against the
+# row-level INSERT/UPDATE path in auction_db. Run from the repository root:
+#
+#     python -m benchmarks.bench_writes
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from auction_db import init_db, insert_player, update_team_budget
+
+SIZES = [20, 200, 2000, 20000]
+SALES = 20
+TEAMS = ["CSK", "MI", "RCB", "RR", "SRH", "KKR", "GT", "DC", "LSG", "PBKS"]
+
+
+# Function to build a players DataFrame with n sold players
+def make_players(n):
+    return pd.DataFrame({
+        "id": range(1, n + 1),
+        "name": [f"PLAYER {i}" for i in range(1, n + 1)],
+        "sold_amount": [100 + i % 900 for i in range(n)],
+        "rating": [70 + i % 30 for i in range(n)],
+        "team_bought": [TEAMS[i % len(TEAMS)] for i in range(n)],
+        "category": ["Batter", "Bowler", "Allrounder", "Wicketkeeper"] * (n // 4) + ["Batter"] * (n % 4),
+        "nationality": ["Indian", "Foreign"] * (n // 2) + ["Indian"] * (n % 2),
+    })
+
+
+# Function to seed a fresh database file with n players and the teams
+def seed_db(path, n):
+    conn = init_db(path)
+    players = make_players(n)
+    with conn:
+        conn.executemany("INSERT INTO teams VALUES (?, ?)", [(team, 9000000) for team in TEAMS])
+        conn.executemany(
+            "INSERT INTO players (id, name, sold_amount, rating, team_bought, category, nationality) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            players.itertuples(index=False, name=None),
+        )
+    return conn, players
+
+
+# Old path: append in memory, then rewrite both tables
+def sale_full_rewrite(conn, players, teams, player):
+    players = pd.concat([players, pd.DataFrame([player])], ignore_index=True)
+    teams.loc[teams["team"] == player["team_bought"], "budget"] -= player["sold_amount"]
+    teams.to_sql("teams", conn, if_exists="replace", index=False)
+    players.to_sql("players", conn, if_exists="replace", index=False)
+    return players
+
+
+# New path: one INSERT and one UPDATE in a single transaction
+def sale_row_level(conn, budgets, player):
+    budgets[player["team_bought"]] -= player["sold_amount"]
+    with conn:
+        insert_player(conn, player)
+        update_team_budget(conn, player["team_bought"], budgets[player["team_bought"]])
+
+
+# Function to time SALES sales at one table size for both paths
+def run(n, tmpdir):
+    results = {}
+    for mode in ("full_rewrite", "row_level"):
+        path = os.path.join(tmpdir, f"{mode}_{n}.db")
+        conn, players = seed_db(path, n)
+        if mode == "full_rewrite":
+            # The old code predates the foreign key, which would stop teams being dropped under players
+            conn.execute("PRAGMA foreign_keys=OFF")
+        teams = pd.read_sql("SELECT * FROM teams", conn)
+        budgets = dict(zip(teams["team"], teams["budget"]))
+        start = time.perf_counter()
+        for i in range(SALES):
+            player = {
+                "id": n + i + 1,
+                "name": f"NEW PLAYER {i}",
+                "sold_amount": 500,
+                "rating": 85,
+                "team_bought": TEAMS[i % len(TEAMS)],
+                "category": "Batter",
+                "nationality": "Indian",
+            }
+            if mode == "full_rewrite":
+                players = sale_full_rewrite(conn, players, teams, player)
+            else:
+                sale_row_level(conn, budgets, player)
+        results[mode] = (time.perf_counter() - start) / SALES * 1000
+        conn.close()
+    return results
+
+
+def main():
+    print(f"{'players':>8} {'full rewrite (ms/sale)':>24} {'row level (ms/sale)':>22}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in SIZES:
+            results = run(n, tmpdir)
+            print(f"{n:>8} {results['full_rewrite']:>24.2f} {results['row_level']:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# Load test: many spectator sessions and one admin selling players, all on this machine.
+#
+# Starts the real dashboard with `streamlit run app.py` in a scratch directory
+# with a fresh auction.db (the repository's database is not touched), then
+# connects headless clients to it over Streamlit's websocket, speaking the same
+# protobuf messages a browser does:
+#
+#   - N spectators open ?view=spectator and send the auto-refresh fragment's
+#     tick every second, exactly like the page in a browser; a tick that finds
+#     a new version turns into a full rerun of the page.
+#   - One admin logs in and submits a sale through the player form at
+#     --sale-rate sales per second.
+#
+# Reports rerun latency percentiles (spectator full reruns, spectator fragment
+# ticks, admin sale submits), the SQLite write latency of each sale (timed
+# inside the server around the record_player_add transaction), and the server
+# process's resident memory before and after the sessions connect. Run from the
+# repository root, for example:
+#
+#     python -m benchmarks.load_test --spectators 50 --sale-rate 2 --duration 60
+import argparse
+import asyncio
+import base64
+import os
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.Selectbox_pb2 import Selectbox
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+ADMIN_PASSWORD = "admin123"
+TEAMS = ["CSK", "DC", "GT", "KKR", "LSG", "MI", "PBKS", "RCB", "RR", "SRH"]
+
+# Written by the server process, one sale's write time in seconds per line
+WRITE_LOG = "write_latencies.txt"
+
+FULL_RUN = ForwardMsg.FINISHED_SUCCESSFULLY
+FRAGMENT_RUN = ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY
+
+# Newer Streamlit sends a selectbox choice as the option text, older versions as its index
+SELECTBOX_BY_TEXT = "raw_value" in Selectbox.DESCRIPTOR.fields_by_name
+
+
+# Function to read a process's resident memory in MB
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    output = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True).stdout
+    return int(output.strip() or 0) / 1024
+
+# Function to summarise latencies (seconds) as a line of millisecond percentiles
+def percentiles(samples):
+    if not samples:
+        return "no samples"
+    samples = sorted(samples)
+    def pick(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+    return (f"n={len(samples):<6} p50 {statistics.median(samples) * 1000:8.1f} ms  p90 {pick(0.90):8.1f} ms"
+            f"  p99 {pick(0.99):8.1f} ms  max {samples[-1] * 1000:8.1f} ms")
+
+
+# Just enough of a websocket client (RFC 6455) to talk to the Streamlit server
+class WebSocket:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=1 << 24)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nOrigin: http://127.0.0.1:{port}\r\n"
+            f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+            f"Sec-WebSocket-Version: 13\r\nSec-WebSocket-Protocol: streamlit\r\n\r\n".encode()
+        )
+        response = await reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in response.split(b"\r\n", 1)[0]:
+            raise ConnectionError(response.split(b"\r\n", 1)[0].decode())
+        return cls(reader, writer)
+
+    async def send(self, data, opcode=0x2):
+        # Client frames must be masked
+        mask = os.urandom(4)
+        if len(data) < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | len(data))
+        elif len(data) < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, len(data))
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, len(data))
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(data))
+        self.writer.write(header + mask + masked)
+        await self.writer.drain()
+
+    async def recv(self):
+        message = b""
+        while True:
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            payload = await self.reader.readexactly(length)
+            opcode = first & 0x0F
+            if opcode == 0x8:
+                raise ConnectionError("server closed the websocket")
+            if opcode == 0x9:
+                await self.send(payload, opcode=0xA)
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if first & 0x80:
+                return message
+
+    def close(self):
+        self.writer.close()
+
+
+# One browser session: sends reruns and remembers the widgets the last run drew
+class Session:
+    def __init__(self, websocket, query_string=""):
+        self.websocket = websocket
+        self.query_string = query_string
+        self.widgets = {}  # (element type, label) -> element proto
+        self.fragment_id = None
+        self.errors = []
+
+    @classmethod
+    async def open(cls, port, query_string=""):
+        return cls(await WebSocket.connect(port, "/_stcore/stream"), query_string)
+
+    # Run the script (or just the fragment) and wait for it to finish; returns (seconds, finish status)
+    async def run(self, widget_values=(), fragment_id=None):
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.query_string = self.query_string
+        for widget_id, field, value in widget_values:
+            state = client_state.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, field, value)
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+            client_state.is_auto_rerun = True
+
+        start = time.perf_counter()
+        await self.websocket.send(msg.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.websocket.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    self.errors.append(element.exception.message)
+                elif element_type in ("text_input", "number_input", "selectbox", "button"):
+                    widget = getattr(element, element_type)
+                    self.widgets[element_type, widget.label] = widget
+            elif kind == "auto_rerun":
+                self.fragment_id = forward.auto_rerun.fragment_id
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - start, forward.script_finished
+
+    def widget(self, element_type, label_prefix):
+        for (kind, label), widget in self.widgets.items():
+            if kind == element_type and label.startswith(label_prefix):
+                return widget
+        raise LookupError(f"no {element_type} labelled {label_prefix!r} on the page")
+
+
+class LoadTest:
+    def __init__(self, args, port):
+        self.args = args
+        self.port = port
+        self.stopping = False
+        self.sales_made = 0
+        self.spectator_latencies = []  # ticks that found a change and reran the page
+        self.tick_latencies = []  # ticks that found nothing new
+        self.admin_latencies = []
+        self.errors = []
+
+    async def spectator(self, session):
+        try:
+            while not self.stopping:
+                await asyncio.sleep(self.args.tick)
+                elapsed, status = await session.run(fragment_id=session.fragment_id)
+                (self.spectator_latencies if status == FULL_RUN else self.tick_latencies).append(elapsed)
+        except Exception as e:
+            self.errors.append(f"spectator: {e!r}")
+
+    async def admin(self, session, password_values):
+        interval = 1 / self.args.sale_rate
+        next_sale = time.perf_counter()
+        i = 0
+        try:
+            while not self.stopping:
+                await asyncio.sleep(max(0, next_sale - time.perf_counter()))
+                next_sale += interval
+
+                # The Team Bought options carry live budgets, so use the ones drawn by the last run
+                team_select = session.widget("selectbox", "Team Bought")
+                team_index = next(n for n, option in enumerate(team_select.options) if option.startswith(TEAMS[i % len(TEAMS)] + " ("))
+                team_value = ("string_value", team_select.options[team_index]) if SELECTBOX_BY_TEXT else ("int_value", team_index)
+                values = password_values + [
+                    (session.widget("text_input", "Player Name").id, "string_value", f"LOAD PLAYER {i}"),
+                    (session.widget("number_input", "Sold Amount").id, "int_value", 1),
+                    (team_select.id,) + team_value,
+                    (session.widget("number_input", "Player Rating").id, "int_value", 50 + i % 50),
+                    (session.widget("button", "Add Player").id, "trigger_value", True),
+                ]
+                elapsed, _ = await session.run(values)
+                self.admin_latencies.append(elapsed)
+                self.sales_made += 1
+                i += 1
+        except Exception as e:
+            self.errors.append(f"admin: {e!r}")
+
+    async def run(self, server_pid):
+        args = self.args
+        print(f"{args.spectators} spectators, 1 admin at {args.sale_rate} sales/s for {args.duration} s")
+
+        admin = await Session.open(self.port)
+        await admin.run()
+        password_values = [(admin.widget("text_input", "Enter Admin Password").id, "string_value", ADMIN_PASSWORD)]
+        await admin.run(password_values)
+        rss_start = rss_mb(server_pid)
+
+        spectators = []
+        for _ in range(args.spectators):
+            session = await Session.open(self.port, "view=spectator")
+            await session.run()
+            spectators.append(session)
+        rss_sessions = rss_mb(server_pid)
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(self.spectator(session)) for session in spectators]
+        tasks.append(asyncio.create_task(self.admin(admin, password_values)))
+        await asyncio.sleep(args.duration)
+        self.stopping = True
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - start
+        rss_end = rss_mb(server_pid)
+
+        for session in spectators + [admin]:
+            self.errors.extend(session.errors)
+            session.websocket.close()
+
+        print(f"sales made          {self.sales_made} ({self.sales_made / wall:.2f}/s, target {args.sale_rate}/s)")
+        print(f"spectator rerun     {percentiles(self.spectator_latencies)}")
+        print(f"spectator tick      {percentiles(self.tick_latencies)}")
+        print(f"admin sale rerun    {percentiles(self.admin_latencies)}")
+        with open(WRITE_LOG) as f:
+            print(f"sqlite write        {percentiles([float(line) for line in f])}")
+        print(f"server rss          {rss_start:.1f} MB with the admin session, {rss_sessions:.1f} MB with"
+              f" spectators, {rss_end:.1f} MB at end; {(rss_end - rss_start) / max(1, args.spectators):.2f} MB"
+              " per spectator")
+        for error in self.errors[:5]:
+            print(f"error: {error}")
+
+
+# Function to run the dashboard server (in the scratch directory), timing each sale's write
+def serve(port):
+    import storage
+    from streamlit.web import cli
+
+    record_player_add = storage.SQLiteStorage.record_player_add
+
+    def timed_record_player_add(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return record_player_add(*args, **kwargs)
+        finally:
+            with open(WRITE_LOG, "a") as f:
+                f.write(f"{time.perf_counter() - start}\n")
+
+    storage.SQLiteStorage.record_player_add = timed_record_player_add
+    sys.argv = ["streamlit", "run", APP_PATH, "--server.headless", "true", "--server.port", str(port),
+                "--browser.gatherUsageStats", "false"]
+    cli.main()
+
+# Function to pick a free local port for the server
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# Function to wait for the server's health check to answer
+def wait_until_healthy(port, server, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("the dashboard server exited during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError("the dashboard server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test app.py with spectator sessions and one admin.")
+    parser.add_argument("--spectators", type=int, default=20, help="number of spectator sessions")
+    parser.add_argument("--sale-rate", type=float, default=1.0, help="admin sales per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run once every session is open")
+    parser.add_argument("--tick", type=float, default=1.0, help="seconds between a spectator's auto-refresh ticks")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    from auction_db import init_db, insert_team
+
+    # A fresh database in a scratch directory; app.py opens auction.db relative to the working directory
+    scratch = tempfile.mkdtemp(prefix="auction-load-")
+    os.chdir(scratch)
+    conn = init_db()
+    with conn:
+        for team in TEAMS:
+            insert_team(conn, team, 10 ** 7)
+    conn.close()
+    open(WRITE_LOG, "w").close()
+
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.load_test", "--serve", str(port)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_healthy(port, server)
+        asyncio.run(LoadTest(args, port).run(server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"scratch directory: {scratch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Live bidding: one lot (player) at a time goes under the hammer, teams raise paddles,
+# and when the countdown runs out the lot is sold to the highest bidder.
+#
+# Bids are held in memory and never touch storage or the Streamlit script: a bid is a
+# few comparisons under the engine's lock, checked against the team's remaining budget
+# in the latest AuctionState snapshot (kept up to date by every sale rather than
+# recomputed), so the engine takes hundreds of bids a second from any number of
+# sessions or API clients. Only closing the lot writes anything: the sale goes through
+# AuctionState.add_player, which commits the player row and the budget together.
+#
+# The current lot is published as an immutable LotState, replaced on every bid, so
+# readers (the dashboard's live lot panel in every session) never lock or copy.
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from auction_db import WriteConflict
+
+# Bid increments in lakhs, as (from amount, increment) steps: 5 lakhs up to 1 Cr, 10 up
+# to 2 Cr, 20 up to 3 Cr and 25 beyond, as in the IPL auction
+DEFAULT_INCREMENTS = ((0, 5), (100, 10), (200, 20), (300, 25))
+
+Bid = namedtuple("Bid", ["team", "amount", "time"])
+
+# status is "open" while bidding, then "sold", "unsold" (no bids) or "failed" (the sale couldn't
+# be recorded; message says why). deadline is a time.time() value. recent_bids holds the
+# lot's latest bids, newest first (up to BiddingEngine.RECENT_BIDS), for the Live Lot panel
+# and GET /lot. player is the stored player dict once the lot has been recorded.
+LotState = namedtuple(
+    "LotState",
+    ["number", "name", "rating", "category", "nationality", "base_price", "increments",
+     "high_bid", "bid_count", "recent_bids", "deadline", "status", "player", "message"],
+)
+
+
+# Raised when a bid is refused; the message says why and can be shown to the bidder
+class BidRejected(Exception):
+    pass
+
+
+# Function to get the increment that applies above a given bid
+def increment_for(amount, increments=DEFAULT_INCREMENTS):
+    step = increments[0][1]
+    for start, increment in increments:
+        if amount >= start:
+            step = increment
+    return step
+
+# Function to get the lowest bid a lot will accept next
+def next_bid(lot):
+    if lot.high_bid is None:
+        return lot.base_price
+    return lot.high_bid.amount + increment_for(lot.high_bid.amount, lot.increments)
+
+
+# One per process (see get_bidding_engine in app.py), next to the AuctionState it sells into.
+# A background thread closes each lot when its countdown runs out.
+class BiddingEngine:
+    # Bids kept on each lot for display
+    RECENT_BIDS = 20
+
+    def __init__(self, auction_state):
+        self.state = auction_state
+        self.condition = threading.Condition(threading.RLock())
+        self.lot = None
+        self.lots_opened = 0
+        self.extend_seconds = 0
+        threading.Thread(target=self._close_when_due, name="lot-closer", daemon=True).start()
+
+    # Open the next lot; raises ValueError if a lot is still open or the player already exists.
+    # Each bid pushes the deadline out to at least extend_seconds from the bid ("going once...").
+    def open_lot(self, name, rating, category, nationality, base_price, duration=30, extend_seconds=10,
+                 increments=DEFAULT_INCREMENTS):
+        with self.condition:
+            if self.lot is not None and self.lot.status == "open":
+                raise ValueError(f"Lot '{self.lot.name}' is still open.")
+            if name in self.state.snapshot.player_ids_by_name:
+                raise ValueError(f"Player '{name}' already exists.")
+            self.lots_opened += 1
+            self.extend_seconds = extend_seconds
+            self.lot = LotState(
+                self.lots_opened, name, int(rating), category, nationality, int(base_price), tuple(increments),
+                None, 0, (), time.time() + duration, "open", None, None,
+            )
+            self.condition.notify_all()
+            self.state.feed.publish("lot", self._lot_event(self.lot))
+            return self.lot
+
+    # Place a bid for team; amount defaults to the lowest the lot will accept. Returns the
+    # lot with the bid in place, or raises BidRejected.
+    def place_bid(self, team, amount=None):
+        with self.condition:
+            lot = self.lot
+            now = time.time()
+            if lot is None or lot.status != "open" or now >= lot.deadline:
+                raise BidRejected("No lot is open for bidding.")
+            if lot.high_bid is not None and lot.high_bid.team == team:
+                raise BidRejected(f"{team} already has the highest bid.")
+            minimum = next_bid(lot)
+            amount = minimum if amount is None else int(amount)
+            if amount < minimum:
+                raise BidRejected(f"The next bid must be at least {minimum} lakhs.")
+            budget = self.state.snapshot.team_budgets.get(team)
+            if budget is None:
+                raise BidRejected(f"'{team}' is not a team.")
+            if amount > budget:
+                raise BidRejected(f"{team} can't afford {amount} lakhs (remaining budget {budget} lakhs).")
+            bid = Bid(team, amount, now)
+            self.lot = lot = lot._replace(
+                high_bid=bid, bid_count=lot.bid_count + 1, recent_bids=(bid,) + lot.recent_bids[:self.RECENT_BIDS - 1],
+                deadline=max(lot.deadline, now + self.extend_seconds),
+            )
+            self.state.feed.publish("bid", {"lot": lot.number, "team": team, "amount": amount, "deadline": lot.deadline})
+            return lot
+
+    # Close the open lot now (the hammer falls early); returns the closed lot
+    def close_lot(self):
+        with self.condition:
+            if self.lot is not None and self.lot.status == "open":
+                self._close(self.lot)
+            return self.lot
+
+    # Function to record the lot: a sale to the highest bidder, or unsold if nobody bid. The
+    # player row and the team's budget are written in one transaction by add_player.
+    def _close(self, lot):
+        bid = lot.high_bid
+        team, amount = (bid.team, bid.amount) if bid is not None else ("Unsold", 0)
+        try:
+            player = self.state.add_player(lot.name, amount, lot.rating, team, lot.category, lot.nationality)
+        except (WriteConflict, sqlite3.Error, OSError) as error:  # The lot mustn't stay open if the write fails
+            self.lot = lot._replace(status="failed", message=str(error))
+        else:
+            if player is None:
+                self.lot = lot._replace(status="failed", message=f"Player '{lot.name}' was added by another operator meanwhile.")
+            else:
+                self.lot = lot._replace(status="sold" if bid is not None else "unsold", player=player)
+        self.state.feed.publish("lot", self._lot_event(self.lot))
+
+    def _lot_event(self, lot):
+        return {
+            "lot": lot.number,
+            "name": lot.name,
+            "status": lot.status,
+            "base_price": lot.base_price,
+            "team": lot.high_bid.team if lot.high_bid else None,
+            "amount": lot.high_bid.amount if lot.high_bid else None,
+            "deadline": lot.deadline,
+            "message": lot.message,
+        }
+
+    # Background thread: sleep until the open lot's deadline, then close the lot. A bid only ever
+    # moves the deadline later, so bids don't wake the thread; it checks again when it wakes.
+    def _close_when_due(self):
+        with self.condition:
+            while True:
+                lot = self.lot
+                if lot is None or lot.status != "open":
+                    self.condition.wait()
+                    continue
+                remaining = lot.deadline - time.time()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+                self._close(lot)
@@ -0,0 +1,81 @@
+# Bulk player import from a CSV shaped like players.csv (app0.py's file), for loading
+# the registered players before an auction or the results of a paper auction.
+#
+# Validation runs as whole-column passes over the DataFrame rather than row by row,
+# and an import is all or nothing: if any row is invalid, nothing is written and every
+# problem is reported with its line number.
+import pandas as pd
+
+CATEGORIES = ["Batter", "Bowler", "Allrounder", "Wicketkeeper"]
+NATIONALITIES = ["Indian", "Foreign"]
+
+# players.csv headers -> player columns; the export server's snake_case headers work as they are.
+# An ID column is ignored: imported players get new ids from the database.
+CSV_COLUMNS = {
+    "Name": "name",
+    "Sold Amount": "sold_amount",
+    "Rating": "rating",
+    "Team Bought": "team_bought",
+    "Category": "category",
+    "Nationality": "nationality",
+}
+IMPORT_COLUMNS = list(CSV_COLUMNS.values())
+
+
+# Function to read an uploaded or on-disk CSV into the player columns; raises ValueError if columns are missing
+def read_players_csv(source):
+    frame = pd.read_csv(source, dtype=str, keep_default_na=False).rename(columns=CSV_COLUMNS)
+    missing = [column for column in IMPORT_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"The file has no {', '.join(missing)} column(s).")
+    return frame[IMPORT_COLUMNS]
+
+# Function to validate players for import against the current teams and names.
+# Returns (players, errors): players ready to insert (clean types, sold_amount 0 when unsold),
+# and a DataFrame of (line, name, problem) that is empty when the whole file can be imported.
+def validate_players(frame, team_budgets, existing_names):
+    players = pd.DataFrame({
+        "name": frame["name"].str.strip(),
+        "sold_amount": pd.to_numeric(frame["sold_amount"].str.strip().replace("", "0"), errors="coerce"),
+        "rating": pd.to_numeric(frame["rating"].str.strip(), errors="coerce"),
+        "team_bought": frame["team_bought"].str.strip().replace("", "Unsold"),
+        "category": frame["category"].str.strip(),
+        "nationality": frame["nationality"].str.strip(),
+    })
+    unsold = players["team_bought"] == "Unsold"
+    players.loc[unsold, "sold_amount"] = 0
+
+    checks = [
+        (players["name"] == "", "Player Name is empty"),
+        (players["name"].duplicated(keep="first") & (players["name"] != ""), "Player Name appears earlier in the file"),
+        (players["name"].isin(list(existing_names)), "Player already exists"),
+        (players["sold_amount"].isna() | (players["sold_amount"] % 1 != 0), "Sold Amount is not a whole number"),
+        (players["sold_amount"] < 0, "Sold Amount is negative"),
+        (players["rating"].isna() | (players["rating"] % 1 != 0), "Rating is not a whole number"),
+        ((players["rating"] < 0) | (players["rating"] > 100), "Rating is not between 0 and 100"),
+        (~players["team_bought"].isin(list(team_budgets) + ["Unsold"]), "Team Bought is not a team"),
+        (~players["category"].isin(CATEGORIES), f"Category is not one of {', '.join(CATEGORIES)}"),
+        (~players["nationality"].isin(NATIONALITIES), f"Nationality is not one of {', '.join(NATIONALITIES)}"),
+    ]
+
+    # Budgets: each team's running total of purchases in file order must stay within its budget
+    sold = ~unsold & players["sold_amount"].notna()
+    spend = players["sold_amount"].where(sold, 0).groupby(players["team_bought"]).cumsum()
+    budget = players["team_bought"].map(dict(team_budgets))
+    checks.append((sold & budget.notna() & (spend > budget), "Insufficient budget for Team Bought by this row"))
+
+    problems = []
+    for mask, problem in checks:
+        rows = players.index[mask.fillna(False).astype(bool)]
+        # Line numbers as in a spreadsheet: the header is line 1
+        problems.append(pd.DataFrame({"line": rows + 2, "name": players.loc[rows, "name"], "problem": problem}))
+    errors = pd.concat(problems, ignore_index=True).sort_values("line", kind="stable").reset_index(drop=True)
+
+    if errors.empty:
+        players = players.astype({"sold_amount": "int64", "rating": "int64"})
+    return players, errors
+
+# Function to work out each team's total budget change for a batch of valid players
+def import_budget_changes(players):
+    sold = players[players["team_bought"] != "Unsold"]
+    return {team: -int(amount) for team, amount in sold.groupby("team_bought")["sold_amount"].sum().items()}
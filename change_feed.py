@@ -0,0 +1,69 @@
+# In-process feed of auction changes for push subscribers (the export server's /events stream).
+#
+# AuctionState publishes one event per change with just the delta: the player
+# row involved and the budgets that moved. Each event is encoded once as a
+# Server-Sent Events frame when it is published, so fanning it out to any
+# number of subscribers is only a socket write each.
+import json
+import threading
+import time
+from collections import deque, namedtuple
+
+# id is a counter that only goes up; frame is the encoded SSE message ready to write to a socket.
+# On the wire the id is prefixed with the feed's epoch (see event_id).
+ChangeEvent = namedtuple("ChangeEvent", ["id", "type", "data", "frame"])
+
+
+class ChangeFeed:
+    # Subscribers that reconnect with Last-Event-ID are replayed anything they missed
+    # from this many recent events; older gaps get a "resync" event instead
+    HISTORY = 1000
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=self.HISTORY)
+        self.last_id = 0
+        # Counters restart with the process, so ids carry when this feed started: a subscriber
+        # reconnecting with an id from before a restart is told to resync instead of waiting
+        # for the new counter to reach its old one (and silently missing everything until then)
+        self.epoch = f"{time.time_ns():x}"
+
+    # Function to get the SSE id sent for a counter value
+    def event_id(self, counter):
+        return f"{self.epoch}-{counter}"
+
+    # Function to get the counter from a Last-Event-ID; None if the id wasn't issued by this
+    # feed (e.g. before a restart), meaning the caller has to resync
+    def parse_event_id(self, event_id):
+        epoch, _, counter = event_id.partition("-")
+        if epoch != self.epoch or not counter.isdigit() or int(counter) > self.last_id:
+            return None
+        return int(counter)
+
+    # Publish an event; data must be JSON-serialisable
+    def publish(self, event_type, data):
+        with self.condition:
+            self.last_id += 1
+            # default=int covers numpy integers that come out of pandas rows
+            payload = json.dumps(data, default=int)
+            frame = f"id: {self.event_id(self.last_id)}\nevent: {event_type}\ndata: {payload}\n\n".encode("utf-8")
+            self.events.append(ChangeEvent(self.last_id, event_type, data, frame))
+            self.condition.notify_all()
+
+    # Block until there are events newer than after_id (or the timeout passes) and return them.
+    # Returns None if after_id is older than the history kept, meaning the caller has to resync.
+    def wait_for_events(self, after_id, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id > after_id, timeout)
+            if self.last_id <= after_id:
+                return []
+            if self.events[0].id > after_id + 1:
+                return None
+            # Walk back from the newest event; subscribers are normally only one or two behind
+            missed = []
+            for event in reversed(self.events):
+                if event.id <= after_id:
+                    break
+                missed.append(event)
+            missed.reverse()
+            return missed
@@ -0,0 +1,84 @@
+# Everything the dashboard sections display, precomputed from one snapshot (except the
+# Players Sold table, which app.py fetches from the database a page at a time).
+#
+# A DashboardView is built once per snapshot version (see get_dashboard_view
+# in app.py) and shared by every session, so a rerun only has to hand the
+# prepared values to Streamlit. Like the snapshot it is built from, it is never
+# modified after it is built.
+from collections import namedtuple
+
+import pandas as pd
+
+from auction_db import PLAYER_COLUMNS
+from auction_state import SQUAD_COLUMNS
+from ticker import build_slider_items, build_slider_html
+
+# budget_metrics: (label, value) per team in rank order, e.g. ("CSK²", "37.2 Cr")
+# squads: team -> TeamSquadView; rankings: "1. CSK: 738 points" lines
+DashboardView = namedtuple(
+    "DashboardView",
+    ["version", "slider_html", "budget_metrics", "squads", "rankings", "unsold_players"],
+)
+
+# table is the squad DataFrame; summary holds the bold total/count lines shown under it
+TeamSquadView = namedtuple("TeamSquadView", ["table", "summary"])
+
+# Function to convert rank number to exponent (e.g., 2 → ²)
+def rank_to_exponent(rank):
+    exponents = {1: "¹", 2: "²", 3: "³", 4: "⁴", 5: "⁵", 6: "⁶", 7: "⁷", 8: "⁸", 9: "⁹", 10: "¹⁰"}
+    return exponents.get(rank, str(rank))
+
+# Function to build the Team Budgets metrics with each team's rank as an exponent
+def build_budget_metrics(snapshot):
+    team_rankings = [(team, snapshot.team_stats[team].total_rating) for team in snapshot.team_squads]
+
+    # Sort teams alphabetically if total points are 0, otherwise by total points in descending order
+    if all(points == 0 for _, points in team_rankings):
+        team_rankings = sorted(team_rankings, key=lambda x: x[0])
+    else:
+        team_rankings = sorted(team_rankings, key=lambda x: x[1], reverse=True)
+
+    return [
+        (f"{team}{rank_to_exponent(rank)}", f"{snapshot.team_budgets[team] / 100} Cr")
+        for rank, (team, _) in enumerate(team_rankings, start=1)
+    ]
+
+# Function to build one team's squad table and summary lines
+def build_team_squad_view(snapshot, team):
+    squad = snapshot.team_squads[team]
+    if not squad:
+        return TeamSquadView(None, [])
+    team_stats = snapshot.team_stats[team]
+    summary = [
+        f"**Total Spend Amount of {team}: {team_stats.total_spend / 100} Cr**",
+        f"**Total Rating for {team}: {team_stats.total_rating}**",
+        f"**Remaining Budget of {team}: {snapshot.team_budgets[team] / 100} Cr**",
+        f"**No. of Batters: {team_stats.categories.get('Batter', 0)}**",
+        f"**No. of Bowlers: {team_stats.categories.get('Bowler', 0)}**",
+        f"**No. of Allrounders: {team_stats.categories.get('Allrounder', 0)}**",
+        f"**No. of Wicketkeepers: {team_stats.categories.get('Wicketkeeper', 0)}**",
+        f"**No. of Indian Players: {team_stats.nationalities.get('Indian', 0)}**",
+        f"**No. of Foreign Players: {team_stats.nationalities.get('Foreign', 0)}**",
+        f"**Total No. of Players Bought: {team_stats.num_players}**",
+    ]
+    return TeamSquadView(pd.DataFrame(squad.sorted_values(), columns=SQUAD_COLUMNS), summary)
+
+# Function to build the Team Rankings lines, best team first
+def build_rankings(snapshot):
+    team_rankings = sorted(
+        ((team, snapshot.team_stats[team].total_rating) for team in snapshot.team_squads),
+        key=lambda x: x[1],
+        reverse=True,
+    )
+    return [f"{i}. {team}: {points} points" for i, (team, points) in enumerate(team_rankings, start=1)]
+
+# Function to build the whole view for a snapshot
+def build_dashboard_view(snapshot):
+    return DashboardView(
+        version=snapshot.version,
+        slider_html=build_slider_html(build_slider_items(snapshot)),
+        budget_metrics=build_budget_metrics(snapshot),
+        squads={team: build_team_squad_view(snapshot, team) for team in snapshot.team_squads},
+        rankings=build_rankings(snapshot),
+        unsold_players=pd.DataFrame(snapshot.unsold_players.sorted_values(), columns=PLAYER_COLUMNS),
+    )
@@ -0,0 +1,294 @@
+# Export server for scoreboards and scripts (port 8000 next to the dashboard).
+#
+# Endpoints, each as .csv or .json:
+#     /players   every player row
+#     /teams     every team with its remaining budget
+#     /squads    every team with the players it bought
+#
+# and, when the server is given a ChangeFeed, /events: a Server-Sent Events
+# stream of sale/modify/delete/team/reset events carrying just the change (plus
+# lot/bid events from live bidding), for scoreboards that want to update in
+# place instead of polling.
+#
+# Rows are streamed from the data files on each request rather than served
+# from a copy on disk. Every response carries an ETag derived from the data
+# files' modification stamps, so a client polling with If-None-Match gets a
+# 304 without any rows being read. Responses are gzip-compressed when the
+# client accepts it.
+#
+# A source can also name files to serve as they are (raw_files): app0.py's
+# players.csv and teams.csv keep their own "ID,Name,Sold Amount,..." columns at
+# /players.csv and /teams.csv, as when the whole directory was served.
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PLAYER_FIELDS = ["id", "name", "sold_amount", "rating", "team_bought", "category", "nationality"]
+TEAM_FIELDS = ["team", "budget"]
+SQUAD_FIELDS = ["team"] + [field for field in PLAYER_FIELDS if field != "team_bought"]
+
+# Flush the response to the socket roughly every 64 KB
+CHUNK_SIZE = 64 * 1024
+
+# Idle /events streams get a comment line this often so proxies and clients keep the connection open
+KEEPALIVE_SECONDS = 15
+
+# Function to build an ETag from the modification stamps of a set of files
+def files_etag(paths):
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+        except FileNotFoundError:
+            parts.append("0")
+    return '"' + ".".join(parts) + '"'
+
+
+# Reads the dashboard's SQLite database. Each request opens its own read-only
+# connection, which WAL mode lets run alongside the auctioneer's writes.
+class SQLiteExportSource:
+    def __init__(self, path):
+        self.path = path
+
+    # In WAL mode every commit changes the -wal file and every checkpoint the main file
+    def etag(self):
+        return files_etag([self.path, self.path + "-wal"])
+
+    def _query(self, sql):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            yield from conn.execute(sql)
+        finally:
+            conn.close()
+
+    def players(self):
+        return self._query(
+            """SELECT id, name, sold_amount, rating, COALESCE(team_bought, 'Unsold'), category, nationality
+            FROM players ORDER BY id"""
+        )
+
+    def teams(self):
+        return self._query("SELECT team, budget FROM teams")
+
+    # Rows of (team, id, name, sold_amount, rating, category, nationality) ordered by team;
+    # a team with no players yet has a single row with None for the player fields
+    def squads(self):
+        return self._query(
+            """SELECT t.team, p.id, p.name, p.sold_amount, p.rating, p.category, p.nationality
+            FROM teams t LEFT JOIN players p ON p.team_bought = t.team
+            ORDER BY t.team, p.id"""
+        )
+
+
+# Reads the players.csv / teams.csv pair written by app0.py
+class CsvExportSource:
+    PLAYER_HEADERS = ["ID", "Name", "Sold Amount", "Rating", "Team Bought", "Category", "Nationality"]
+    TEAM_HEADERS = ["Team", "Budget"]
+
+    def __init__(self, players_path, teams_path):
+        self.players_path = players_path
+        self.teams_path = teams_path
+
+    def etag(self):
+        return files_etag([self.players_path, self.teams_path])
+
+    def _read(self, path, headers, numeric):
+        if not os.path.exists(path):
+            return
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                yield tuple(
+                    int(float(record[header])) if header in numeric and record[header] else record[header]
+                    for header in headers
+                )
+
+    def players(self):
+        return self._read(self.players_path, self.PLAYER_HEADERS, {"ID", "Sold Amount", "Rating"})
+
+    def teams(self):
+        return self._read(self.teams_path, self.TEAM_HEADERS, {"Budget"})
+
+    # app0.py's own files, served byte for byte at the paths they always had, so scripts
+    # reading their headers keep working; the .json and /squads exports are built as usual
+    def raw_files(self):
+        return {"/players.csv": self.players_path, "/teams.csv": self.teams_path}
+
+    def squads(self):
+        squads = {team: [] for team, _ in self.teams()}
+        for player in self.players():
+            if player[4] in squads:
+                squads[player[4]].append(player[:4] + player[5:])
+        for team in sorted(squads):
+            if not squads[team]:
+                yield (team,) + (None,) * (len(SQUAD_FIELDS) - 1)
+            for player in squads[team]:
+                yield (team,) + player
+
+
+# Function to read a file as text pieces; decoded with surrogateescape, so they encode back
+# to exactly the file's bytes
+def file_pieces(path):
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                return
+            yield data.decode("utf-8", "surrogateescape")
+
+# Function to render rows as CSV text pieces
+def csv_pieces(fields, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+# Function to render rows as a JSON array of objects
+def json_array_pieces(fields, rows):
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(dict(zip(fields, row)))
+    yield "]"
+
+# Function to render squad rows as a JSON object of team -> list of players
+def json_squads_pieces(rows):
+    yield "{"
+    current_team = None
+    for row in rows:
+        team, player = row[0], row[1:]
+        if team != current_team:
+            yield ("]," if current_team is not None else "") + json.dumps(team) + ":["
+            current_team, first = team, True
+        if player[0] is not None:
+            yield ("" if first else ",") + json.dumps(dict(zip(SQUAD_FIELDS[1:], player)))
+            first = False
+    yield ("]" if current_team is not None else "") + "}"
+
+
+class ExportRequestHandler(BaseHTTPRequestHandler):
+    # Set on the subclass built by start_export_server
+    source = None
+    feed = None
+
+    def _pieces(self, path):
+        source = self.source
+        raw_files = source.raw_files() if hasattr(source, "raw_files") else {}
+        if path in raw_files:
+            if not os.path.exists(raw_files[path]):
+                return None, None
+            return "text/csv", file_pieces(raw_files[path])
+        if path == "/players.csv":
+            return "text/csv", csv_pieces(PLAYER_FIELDS, source.players())
+        if path == "/players.json":
+            return "application/json", json_array_pieces(PLAYER_FIELDS, source.players())
+        if path == "/teams.csv":
+            return "text/csv", csv_pieces(TEAM_FIELDS, source.teams())
+        if path == "/teams.json":
+            return "application/json", json_array_pieces(TEAM_FIELDS, source.teams())
+        if path == "/squads.csv":
+            return "text/csv", csv_pieces(SQUAD_FIELDS, source.squads())
+        if path == "/squads.json":
+            return "application/json", json_squads_pieces(source.squads())
+        return None, None
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/events" and self.feed is not None:
+            self._stream_events()
+            return
+        content_type, pieces = self._pieces(path)
+        if pieces is None:
+            self.send_error(404, "Unknown export", "Try /players, /teams or /squads with .csv or .json")
+            return
+
+        etag = self.source.etag()
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        # HTTP/1.0 without Content-Length: the body ends when the connection closes, so rows can stream
+        self.end_headers()
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if use_gzip else None  # wbits=31 writes a gzip header
+        pending = []
+        pending_size = 0
+        for piece in pieces:
+            pending.append(piece)
+            pending_size += len(piece)
+            if pending_size >= CHUNK_SIZE:
+                self._write("".join(pending).encode("utf-8", "surrogateescape"), compressor)
+                pending, pending_size = [], 0
+        self._write("".join(pending).encode("utf-8", "surrogateescape"), compressor)
+        if compressor is not None:
+            self.wfile.write(compressor.flush())
+
+    def _write(self, data, compressor):
+        self.wfile.write(compressor.compress(data) if compressor is not None else data)
+
+    # Hold the connection open and write each feed event as it is published. A client that
+    # reconnects with Last-Event-ID gets what it missed; a new client starts from now. A client
+    # whose id is from before a dashboard restart is sent a resync straight away.
+    def _stream_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        last_event_id = self.headers.get("Last-Event-ID")
+        last_id = self.feed.parse_event_id(last_event_id) if last_event_id else self.feed.last_id
+        try:
+            self.wfile.write(b"retry: 1000\n\n")
+            self.wfile.flush()
+            while True:
+                events = None if last_id is None else self.feed.wait_for_events(last_id, timeout=KEEPALIVE_SECONDS)
+                if events is None:
+                    # Too far behind to replay, or from before a restart: tell the client to refetch the exports
+                    last_id = self.feed.last_id
+                    self.wfile.write(f"id: {self.feed.event_id(last_id)}\nevent: resync\ndata: {{}}\n\n".encode("utf-8"))
+                elif not events:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    self.wfile.write(b"".join(event.frame for event in events))
+                    last_id = events[-1].id
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The subscriber went away
+
+    # Keep polling clients out of the dashboard's console
+    def log_message(self, format, *args):
+        pass
+
+
+class ExportHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # A room full of scoreboards may all (re)connect to /events at once
+    request_queue_size = 512
+
+
+# Function to start the export server on a background thread; returns the server.
+# Pass the AuctionState's feed to serve /events.
+def start_export_server(source, port=8000, feed=None):
+    handler = type("BoundExportRequestHandler", (ExportRequestHandler,), {"source": source, "feed": feed})
+    httpd = ExportHTTPServer(("", port), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
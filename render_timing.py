@@ -0,0 +1,140 @@
+# Render timing for app.py: how long each numbered section of a rerun takes,
+# and how long each database call made during it takes.
+#
+# A RerunTimer is started at the top of the script and told where each section
+# begins; database functions decorated with @timed_db_call add themselves to
+# the timer running on their thread, if any. Finished reruns go into a
+# TimingLog shared by the whole process, which the admin's timing panel reads
+# and exports.
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+# The rerun being timed on each script thread
+_current = threading.local()
+
+# The profiler started on each script thread, until profile_report stops it
+_profiling = threading.local()
+
+
+# Function decorator that adds a database call's duration to the running rerun's timings
+def timed_db_call(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timer = getattr(_current, "timer", None)
+        if timer is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timer.db_calls.append((func.__name__, time.perf_counter() - start))
+    return wrapper
+
+
+class RerunTimer:
+    def __init__(self):
+        self.page = None
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.sections = []  # (name, seconds), in order
+        self.db_calls = []  # (function name, seconds), in order
+        self.total = None
+        self._section = None
+        self._section_start = None
+        _current.timer = self
+
+    # Close the section running now (if any) and start timing the next one
+    def section(self, name):
+        now = time.perf_counter()
+        if self._section is not None:
+            self.sections.append((self._section, now - self._section_start))
+        self._section, self._section_start = name, now
+
+    # Stop timing and add this rerun to the log under page (e.g. "admin" or "spectator")
+    def finish(self, log, page):
+        self.page = page
+        self.section(None)
+        self.total = time.perf_counter() - self.start
+        if getattr(_current, "timer", None) is self:
+            _current.timer = None
+        log.add(self)
+
+    def to_frame(self):
+        rows = [("section", name, seconds * 1000) for name, seconds in self.sections]
+        rows += [("db", name, seconds * 1000) for name, seconds in self.db_calls]
+        return pd.DataFrame(rows, columns=["kind", "name", "ms"]).round(2)
+
+
+class TimingLog:
+    # Records kept across all sessions; the oldest are dropped first
+    MAX_RECORDS = 20000
+    COLUMNS = ["time", "rerun", "page", "kind", "name", "ms"]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = deque(maxlen=self.MAX_RECORDS)
+        self.reruns = 0
+
+    def add(self, timer):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timer.started_at))
+        with self.lock:
+            self.reruns += 1
+            rows = [(stamp, self.reruns, timer.page, "rerun", "total", timer.total * 1000)]
+            rows += [(stamp, self.reruns, timer.page, "section", name, seconds * 1000) for name, seconds in timer.sections]
+            rows += [(stamp, self.reruns, timer.page, "db", name, seconds * 1000) for name, seconds in timer.db_calls]
+            self.records.extend(rows)
+
+    def to_frame(self):
+        with self.lock:
+            return pd.DataFrame(list(self.records), columns=self.COLUMNS)
+
+    # Per section / DB function: how many times it ran and its median, 90th percentile and worst time
+    def summary(self):
+        frame = self.to_frame()
+        if frame.empty:
+            return frame
+        grouped = frame.groupby(["kind", "name"], sort=False)["ms"]
+        summary = grouped.agg(count="count", median_ms="median", max_ms="max")
+        summary.insert(2, "p90_ms", grouped.quantile(0.9))
+        return summary.round(2).reset_index()
+
+    def to_csv(self):
+        return self.to_frame().to_csv(index=False)
+
+
+# Function to stop a profiler left running on this thread by a profiled rerun that never got
+# to profile_report (cut short by st.rerun, or by a widget interaction stopping the script).
+# Called at the top of every rerun, so the thread isn't profiled from then on and a new
+# profiler can start.
+def stop_leftover_profile():
+    profiler = getattr(_profiling, "profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _profiling.profiler = None
+
+# Function to start profiling this thread; returns None if another profiler is already running
+def start_profile():
+    stop_leftover_profile()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    _profiling.profiler = profiler
+    return profiler
+
+# Function to stop a profiler and return its top functions by cumulative time as text
+def profile_report(profiler, limit=40):
+    profiler.disable()
+    if getattr(_profiling, "profiler", None) is profiler:
+        _profiling.profiler = None
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,307 @@
+# Sale and bid API for remote operators and scripted feeds (port 8001, next to the export
+# server on port 8000). JSON over HTTP/1.1 with keep-alive, served by asyncio on a single
+# thread, so a room full of connected clients costs no threads.
+#
+#     POST /sales   a sale {"name", "sold_amount", "rating", "team_bought", "category",
+#                   "nationality"}, or a list of them; 201 with the stored players and the
+#                   teams' new budgets
+#     POST /bids    {"team", "amount"} on the live lot (amount defaults to the next
+#                   increment); 200 with the lot
+#     GET  /lot     the live lot, with its latest bids
+#
+# POSTs need "Authorization: Bearer <token>"; the token can't be empty. The API listens on
+# 127.0.0.1 unless it is started with another host, since anyone who can reach it and holds
+# the token can record sales. Errors come back as {"error": message} with
+# 400 (bad request), 401 (no or wrong token), 409 (name taken, budget or bid refused),
+# 503 (the write failed) or 500 (anything else went wrong; nothing was saved).
+#
+# Sales queue for one committer, which takes everything queued so far (up to BATCH_SIZE
+# sales), checks it under the AuctionState's lock against the latest budgets (less what the
+# requests ahead of it in the batch spend, so a batch can't oversell a team), and writes the
+# sales that pass as one transaction through AuctionState.add_players before answering every
+# request in the group. There is no added wait: a lone sale is committed at once, and under
+# load the sales that arrive while one commit runs go together in the next.
+import asyncio
+import hmac
+import json
+import socket
+import sqlite3
+import threading
+from collections import namedtuple
+
+from auction_db import WriteConflict
+from bidding import BidRejected
+from bulk_import import CATEGORIES, NATIONALITIES
+
+API_HOST = "127.0.0.1"
+API_PORT = 8001
+BATCH_SIZE = 100
+
+# Largest request body accepted, and the most sales in one request
+MAX_BODY = 1024 * 1024
+MAX_SALES = 1000
+
+REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+# Accepted sales from one request, and the future its handler waits on for (status, payload)
+SaleJob = namedtuple("SaleJob", ["sales", "future"])
+
+
+# Raised while handling a request to answer it with an error status
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Function to check one sale from a request body; returns it with clean types or raises ApiError
+def parse_sale(data):
+    if not isinstance(data, dict):
+        raise ApiError(400, "A sale must be a JSON object.")
+    missing = [field for field in ("name", "sold_amount", "rating", "team_bought", "category", "nationality") if field not in data]
+    if missing:
+        raise ApiError(400, f"Missing {', '.join(missing)}.")
+    name = data["name"].strip() if isinstance(data["name"], str) else ""
+    if not name:
+        raise ApiError(400, "Player Name cannot be empty.")
+    for field in ("sold_amount", "rating"):
+        if not isinstance(data[field], int) or isinstance(data[field], bool) or data[field] < 0:
+            raise ApiError(400, f"{field} must be a whole number of at least 0.")
+    if data["rating"] > 100:
+        raise ApiError(400, "rating must be between 0 and 100.")
+    if data["category"] not in CATEGORIES:
+        raise ApiError(400, f"category must be one of {', '.join(CATEGORIES)}.")
+    if data["nationality"] not in NATIONALITIES:
+        raise ApiError(400, f"nationality must be one of {', '.join(NATIONALITIES)}.")
+    return {
+        "name": name,
+        "sold_amount": data["sold_amount"] if data["team_bought"] != "Unsold" else 0,
+        "rating": data["rating"],
+        "team_bought": str(data["team_bought"]),
+        "category": data["category"],
+        "nationality": data["nationality"],
+    }
+
+# Function to describe a lot as JSON
+def lot_json(lot):
+    if lot is None:
+        return {"lot": None}
+    return {
+        "lot": lot.number,
+        "name": lot.name,
+        "status": lot.status,
+        "base_price": lot.base_price,
+        "team": lot.high_bid.team if lot.high_bid else None,
+        "amount": lot.high_bid.amount if lot.high_bid else None,
+        "bids": lot.bid_count,
+        "recent_bids": [{"team": bid.team, "amount": bid.amount, "time": bid.time} for bid in lot.recent_bids],
+        "deadline": lot.deadline,
+        "message": lot.message,
+    }
+
+
+class SaleApi:
+    def __init__(self, auction_state, bidding_engine, token, batch_size=BATCH_SIZE):
+        self.state = auction_state
+        self.engine = bidding_engine
+        self.token = token
+        self.batch_size = batch_size
+        self.queue = None
+        # Group commit counters, for benchmarks
+        self.commits = 0
+        self.committed_sales = 0
+
+    # Serve on an already bound listening socket until the loop stops
+    async def serve(self, sock):
+        self.queue = asyncio.Queue()
+        committer = asyncio.create_task(self._commit_batches())
+        server = await asyncio.start_server(self._handle_connection, sock=sock)
+        async with server:
+            await asyncio.gather(server.serve_forever(), committer)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "Request body too large."}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._respond(method, path.split("?", 1)[0], headers, body)
+                    keep_alive = version.strip() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass  # Malformed request or the client went away
+        finally:
+            writer.close()
+
+    # Function to handle one request; returns (status, payload)
+    async def _respond(self, method, path, headers, body):
+        try:
+            if path == "/lot":
+                if method != "GET":
+                    raise ApiError(405, "Use GET.")
+                return 200, lot_json(self.engine.lot)
+            if path not in ("/sales", "/bids"):
+                raise ApiError(404, "Not found.")
+            if method != "POST":
+                raise ApiError(405, "Use POST.")
+            supplied = headers.get("authorization", "").removeprefix("Bearer ").encode("utf-8")
+            if not hmac.compare_digest(supplied, self.token.encode("utf-8")):
+                raise ApiError(401, "Missing or wrong API token.")
+            try:
+                data = json.loads(body)
+            except ValueError:
+                raise ApiError(400, "The body must be JSON.")
+            if path == "/bids":
+                return self._bid(data)
+            return await self._sell(data)
+        except ApiError as error:
+            return error.status, {"error": str(error)}
+
+    def _bid(self, data):
+        if not isinstance(data, dict) or not isinstance(data.get("team"), str):
+            raise ApiError(400, "A bid needs a team.")
+        amount = data.get("amount")
+        if amount is not None and (not isinstance(amount, int) or isinstance(amount, bool)):
+            raise ApiError(400, "amount must be a whole number.")
+        try:
+            lot = self.engine.place_bid(data["team"], amount)
+        except BidRejected as rejected:
+            raise ApiError(409, str(rejected))
+        return 200, lot_json(lot)
+
+    async def _sell(self, data):
+        many = isinstance(data, list)
+        if many and not 0 < len(data) <= MAX_SALES:
+            raise ApiError(400, f"Send between 1 and {MAX_SALES} sales at a time.")
+        sales = [parse_sale(sale) for sale in (data if many else [data])]
+        job = SaleJob(sales, asyncio.get_running_loop().create_future())
+        self.queue.put_nowait(job)
+        status, payload = await job.future
+        if status == 201 and not many:
+            payload = {"player": payload["players"][0], "budgets": payload["budgets"]}
+        return status, payload
+
+    # The committer: take everything queued (up to batch_size sales), commit it on a worker
+    # thread, answer each request, repeat. Whatever goes wrong with one batch is answered
+    # with a 500 for its requests, and the committer carries on with the next.
+    async def _commit_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self.queue.get()]
+            size = len(jobs[0].sales)
+            while size < self.batch_size and not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+                size += len(jobs[-1].sales)
+            try:
+                results = await loop.run_in_executor(None, self._commit, jobs)
+            except Exception as error:
+                results = [(500, {"error": f"{error!r} Nothing was saved."})] * len(jobs)
+            for job, result in zip(jobs, results):
+                job.future.set_result(result)
+
+    # Function to check one job's sales against the latest snapshot, less what the jobs
+    # accepted before it in the batch spend and the names they take; raises ApiError if any
+    # can't be sold, otherwise adds the job's spend and names to the batch's
+    def _check(self, sales, snapshot, spend, names):
+        job_spend = {}
+        job_names = set()
+        for sale in sales:
+            name, team = sale["name"], sale["team_bought"]
+            if name in snapshot.player_ids_by_name or name in names or name in job_names:
+                raise ApiError(409, f"Player '{name}' already exists.")
+            job_names.add(name)
+            if team != "Unsold":
+                if team not in snapshot.team_budgets:
+                    raise ApiError(400, f"'{team}' is not a team.")
+                job_spend[team] = job_spend.get(team, 0) + sale["sold_amount"]
+        for team, amount in job_spend.items():
+            available = snapshot.team_budgets[team] - spend.get(team, 0)
+            if amount > available:
+                raise ApiError(409, f"Insufficient budget for {team}! Available budget: {available} lakhs.")
+        for team, amount in job_spend.items():
+            spend[team] = spend.get(team, 0) + amount
+        names.update(job_names)
+
+    # Function to commit a group of jobs in one transaction; returns (status, payload) for each.
+    # The jobs are checked under the state's lock, against the budgets the commit will change,
+    # and those that can't be sold are answered without holding up the rest. If the group is
+    # refused as a whole (another process spent a budget or took a name meanwhile), each job is
+    # committed on its own so one can't fail the others.
+    def _commit(self, jobs):
+        with self.state.lock:
+            snapshot = self.state.snapshot
+            spend, names = {}, set()
+            results = [None] * len(jobs)
+            accepted = []
+            for i, job in enumerate(jobs):
+                try:
+                    self._check(job.sales, snapshot, spend, names)
+                except ApiError as error:
+                    results[i] = (error.status, {"error": str(error)})
+                else:
+                    accepted.append(i)
+            if not accepted:
+                return results
+
+            sales = [sale for i in accepted for sale in jobs[i].sales]
+            try:
+                entries = self.state.add_players(sales)
+            except (WriteConflict, sqlite3.Error, OSError) as error:
+                entries, failure = None, error
+            else:
+                failure = None if entries is not None else "A player in this request already exists."
+            if failure is not None:
+                if len(accepted) > 1:
+                    for i in accepted:
+                        results[i] = self._commit([jobs[i]])[0]
+                    return results
+                status = 503 if isinstance(failure, (sqlite3.Error, OSError)) else 409
+                results[accepted[0]] = (status, {"error": f"{failure} Nothing was saved."})
+                return results
+
+            self.commits += 1
+            self.committed_sales += len(entries)
+            budgets = self.state.snapshot.team_budgets
+            for i in accepted:
+                players, entries = entries[:len(jobs[i].sales)], entries[len(jobs[i].sales):]
+                teams = {player["team_bought"] for player in players if player["team_bought"] != "Unsold"}
+                results[i] = (201, {"players": players, "budgets": {team: budgets[team] for team in teams}})
+            return results
+
+
+# Function to start the API on a background thread; returns the SaleApi. Raises ValueError if
+# the token is empty (every request would match it) and OSError if the port is taken.
+def start_sale_api(auction_state, bidding_engine, token, host=API_HOST, port=API_PORT, batch_size=BATCH_SIZE):
+    if not token:
+        raise ValueError("The sale API needs a non-empty token.")
+    sock = socket.create_server((host, port), backlog=512)
+    api = SaleApi(auction_state, bidding_engine, token, batch_size)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_until_complete, args=(api.serve(sock),), name="sale-api", daemon=True).start()
+    return api
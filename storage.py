@@ -0,0 +1,480 @@
+# Storage backends for the dashboard's AuctionState. The dashboard picks one at startup
+# (AUCTION_STORAGE=sqlite|file|memory, default sqlite):
+#
+#     SQLiteStorage        auction.db through auction_db (row-level, compare-and-swap writes;
+#                          safe for several dashboard processes sharing the file)
+#     AppendOnlyFileStorage  every change appended as one JSON line to auction_events.jsonl,
+#                          with periodic snapshots; opening it loads the latest snapshot and
+#                          replays the events after it (replaces app0.py's rewrite-the-CSVs
+#                          approach; one dashboard process per file)
+#     MemoryStorage        nothing persisted, like app1.py; starts from app1's teams and budgets
+#
+# Every backend has the same methods, called with AuctionState's lock held:
+#
+#     load()                          -> (players DataFrame of VERSIONED_PLAYER_COLUMNS, {team: budget})
+#     data_version()                  changes when something other than this backend writes
+#     record_player_add(player, budget_changes)            -> (player id, new budgets; the
+#                                     player's own id is kept if it has one)
+#     record_player_adds([(player, budget_changes), ...])  -> (player ids, new budgets), as
+#                                     one all-or-nothing group commit
+#     record_player_modify(player, previous, budget_changes) -> new budgets
+#     record_player_delete(player_id, previous, budget_changes) -> new budgets
+#     record_player_import(players, budget_changes)        -> new budgets
+#     add_team(team, budget), delete_all()
+#     players_page(limit, before_id=None, **filters)       newest first, as load_players_page
+#     export_source()                 rows for the export server on port 8000
+#     close()
+#
+# Budget changes are team -> amount to add (negative for a purchase). A change is applied
+# whole or not at all, and one that no longer matches (the player's row is no longer at the
+# version in previous, or the team can't afford the purchase) raises WriteConflict.
+import json
+import os
+import threading
+
+import pandas as pd
+
+from auction_db import (
+    DB_PATH,
+    PLAYER_COLUMNS,
+    VERSIONED_PLAYER_COLUMNS,
+    init_db,
+    connect_read_only,
+    load_teams_from_db,
+    load_players_from_db,
+    load_players_page,
+    insert_team,
+    delete_all_data,
+    record_player_add,
+    record_player_adds,
+    record_player_modify,
+    record_player_delete,
+    record_player_import,
+    WriteConflict,
+)
+from export_server import SQLiteExportSource, SQUAD_FIELDS, files_etag
+from render_timing import timed_db_call
+
+EVENT_LOG_PATH = "auction_events.jsonl"
+
+# The teams and budgets (in lakhs) app1.py starts every session with
+DEFAULT_TEAM_BUDGETS = {team: 9000 for team in ["CSK", "DC", "GT", "KKR", "LSG", "MI", "PBKS", "RR", "RCB", "SRH"]}
+
+
+# auction.db through the row-level helpers in auction_db
+class SQLiteStorage:
+    def __init__(self, conn):
+        self.conn = conn
+        # The file behind the connection, for read-only page and export queries ("" for :memory:)
+        self.path = conn.execute("PRAGMA database_list").fetchone()[2]
+
+    # Both tables are read in one read transaction, so a commit from another process can't land
+    # between them and leave the snapshot with, say, a new player but the old budget
+    def load(self):
+        self.conn.execute("BEGIN")
+        try:
+            players = load_players_from_db(self.conn)
+            teams = load_teams_from_db(self.conn)
+        finally:
+            self.conn.commit()
+        return players, {team: int(budget) for team, budget in zip(teams["team"], teams["budget"])}
+
+    # PRAGMA data_version changes whenever another connection (another process, a script,
+    # the sqlite3 shell) commits to the database; it ignores this connection's own commits
+    def data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def record_player_add(self, player, budget_changes):
+        return record_player_add(self.conn, player, budget_changes)
+
+    def record_player_adds(self, sales):
+        return record_player_adds(self.conn, sales)
+
+    def record_player_modify(self, player, previous, budget_changes):
+        return record_player_modify(self.conn, player, previous, budget_changes)
+
+    def record_player_delete(self, player_id, previous, budget_changes):
+        return record_player_delete(self.conn, player_id, previous, budget_changes)
+
+    def record_player_import(self, players, budget_changes):
+        return record_player_import(self.conn, players, budget_changes)
+
+    def add_team(self, team, budget):
+        with self.conn:
+            insert_team(self.conn, team, budget)
+
+    def delete_all(self):
+        with self.conn:
+            delete_all_data(self.conn)
+
+    # Pages come from their own read-only connection, which doesn't see (or wait on) the writer's transactions
+    def players_page(self, limit, before_id=None, **filters):
+        conn = connect_read_only(self.path)
+        try:
+            return load_players_page(conn, limit, before_id, **filters)
+        finally:
+            conn.close()
+
+    def export_source(self):
+        return SQLiteExportSource(self.path)
+
+    def close(self):
+        self.conn.close()
+
+
+# Players and budgets held in dicts. Each change is checked, then applied as an event
+# (a plain dict, see _apply); AppendOnlyFileStorage writes the same events to its file
+# before applying them, so replaying the file rebuilds exactly this state.
+class MemoryStorage:
+    def __init__(self, team_budgets=None):
+        self.lock = threading.Lock()  # Guards the dicts against export server threads reading mid-change
+        self.players = {}  # id -> player dict; read it through players_in_order
+        self.in_id_order = True  # False once undo has put back a deleted player at the end
+        self.team_budgets = dict(team_budgets or {})
+        self.next_id = 1  # Ids are never reused, as with SQLite's AUTOINCREMENT
+        self.changes = 0
+
+    @timed_db_call
+    def load(self):
+        with self.lock:
+            players = pd.DataFrame(self.players_in_order(), columns=VERSIONED_PLAYER_COLUMNS)
+            return players, dict(self.team_budgets)
+
+    # Only this object ever writes its state
+    def data_version(self):
+        return 0
+
+    # Function to check a set of budget changes can be applied as a whole
+    def _check_budgets(self, budget_changes):
+        for team, change in budget_changes.items():
+            budget = self.team_budgets.get(team)
+            if budget is None or (change < 0 and budget < -change):
+                raise WriteConflict(f"Insufficient budget for {team}: another operator has spent it since this page loaded.")
+
+    # Function to check a player is still at the version a change was worked out from
+    def _check_unchanged(self, player_id, previous):
+        current = self.players.get(int(player_id))
+        if current is None or current["version"] != int(previous["version"]):
+            raise WriteConflict(f"Player '{previous['name']}' was changed or deleted by another operator.")
+
+    def _new_budgets(self, budget_changes):
+        return {team: self.team_budgets[team] for team in budget_changes}
+
+    @timed_db_call
+    def record_player_add(self, player, budget_changes):
+        self._check_budgets(budget_changes)
+        # A player restored by undo keeps its old id; anyone else gets the next one
+        player_id = self.next_id if player.get("id") is None else player["id"]
+        player = _plain_player({**player, "id": player_id})
+        self._commit({"op": "add", "players": [player], "budgets": _plain_changes(budget_changes)})
+        return player["id"], self._new_budgets(budget_changes)
+
+    # The batch is one event, so it is applied (and replayed) whole or not at all
+    @timed_db_call
+    def record_player_adds(self, sales):
+        budget_changes = {}
+        for _, changes in sales:
+            for team, change in changes.items():
+                budget_changes[team] = budget_changes.get(team, 0) + change
+        self._check_budgets(budget_changes)
+        players = [_plain_player({**player, "id": self.next_id + i}) for i, (player, _) in enumerate(sales)]
+        self._commit({"op": "add", "players": players, "budgets": _plain_changes(budget_changes)})
+        return [player["id"] for player in players], self._new_budgets(budget_changes)
+
+    @timed_db_call
+    def record_player_modify(self, player, previous, budget_changes):
+        self._check_unchanged(player["id"], previous)
+        self._check_budgets(budget_changes)
+        self._commit({"op": "modify", "player": _plain_player(player), "budgets": _plain_changes(budget_changes)})
+        return self._new_budgets(budget_changes)
+
+    @timed_db_call
+    def record_player_delete(self, player_id, previous, budget_changes):
+        self._check_unchanged(player_id, previous)
+        self._check_budgets(budget_changes)
+        self._commit({"op": "delete", "id": int(player_id), "budgets": _plain_changes(budget_changes)})
+        return self._new_budgets(budget_changes)
+
+    @timed_db_call
+    def record_player_import(self, players, budget_changes):
+        self._check_budgets(budget_changes)
+        players = [_plain_player({**player, "id": self.next_id + i}) for i, player in enumerate(players)]
+        self._commit({"op": "add", "players": players, "budgets": _plain_changes(budget_changes)})
+        return self._new_budgets(budget_changes)
+
+    @timed_db_call
+    def add_team(self, team, budget):
+        self._commit({"op": "team", "team": str(team), "budget": int(budget)})
+
+    @timed_db_call
+    def delete_all(self):
+        self._commit({"op": "reset"})
+
+    # Memory has nowhere to write an event first, so committing is just applying it
+    def _commit(self, event):
+        self._apply_events((event,))
+
+    # Function to apply events, in order, to the dicts (one lock for the whole batch, so a
+    # replay of thousands of events doesn't take it per event)
+    def _apply_events(self, events):
+        players, team_budgets = self.players, self.team_budgets
+        with self.lock:
+            for event in events:
+                op = event["op"]
+                if op == "add":
+                    for player in event["players"]:
+                        if players and player["id"] < next(reversed(players)):
+                            self.in_id_order = False
+                        players[player["id"]] = {**player, "version": 0}
+                        if player["id"] >= self.next_id:
+                            self.next_id = player["id"] + 1
+                elif op == "modify":
+                    # Versions aren't written to the log: every modify bumps one, as on SQLite
+                    player_id = event["player"]["id"]
+                    players[player_id] = {**event["player"], "version": players[player_id]["version"] + 1}
+                elif op == "delete":
+                    del players[event["id"]]
+                elif op == "team":
+                    team_budgets[event["team"]] = event["budget"]
+                elif op == "reset":
+                    players.clear()
+                    self.in_id_order = True
+                    team_budgets.clear()
+                for team, change in event.get("budgets", {}).items():
+                    team_budgets[team] += change
+                self.changes += 1
+
+    # Function to list the players in id order, as pages and exports expect (caller holds the
+    # lock). A player restored by undo goes in at the end of the dict, so the first read after
+    # one sorts the dict back into order; the restore itself stays a single insert.
+    def players_in_order(self):
+        if not self.in_id_order:
+            ordered = sorted(self.players.items())
+            self.players.clear()
+            self.players.update(ordered)
+            self.in_id_order = True
+        return list(self.players.values())
+
+    @timed_db_call
+    def players_page(self, limit, before_id=None, team=None, category=None, nationality=None,
+                     min_price=None, max_price=None):
+        with self.lock:
+            players = self.players_in_order()
+        rows = []
+        for player in reversed(players):
+            if before_id is not None and player["id"] >= before_id:
+                continue
+            if ((team is None or player["team_bought"] == team)
+                    and (category is None or player["category"] == category)
+                    and (nationality is None or player["nationality"] == nationality)
+                    and (min_price is None or player["sold_amount"] >= min_price)
+                    and (max_price is None or player["sold_amount"] <= max_price)):
+                rows.append(player)
+                if len(rows) == limit:
+                    break
+        return pd.DataFrame(rows, columns=PLAYER_COLUMNS)
+
+    def export_source(self):
+        return MemoryExportSource(self)
+
+    def close(self):
+        pass
+
+
+# Every change appended to a file as one JSON line (the event log), then applied in memory.
+# Every snapshot_every events the whole state is also written to a compacted snapshot file
+# (path + ".snapshot") recording how much of the log it covers, so opening the log loads the
+# latest snapshot and replays only the events after it: restart time depends on the events
+# since the last snapshot, not on how long the auction has run. The log itself is never
+# rewritten, so it stays a complete history of the auction.
+#
+# A last line cut short by a crash mid-write is ignored (and cut off on open), so the log
+# always replays to the state after the last complete change. A snapshot that doesn't fit
+# the log (the log was replaced or cut shorter) is ignored and the whole log replayed.
+class AppendOnlyFileStorage(MemoryStorage):
+    SNAPSHOT_EVERY = 1000
+
+    # sync=True fsyncs every change (survives power loss); by default each change is flushed
+    # to the operating system, which survives the dashboard process dying
+    def __init__(self, path=EVENT_LOG_PATH, sync=False, snapshot_every=SNAPSHOT_EVERY):
+        super().__init__()
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.sync = sync
+        self.snapshot_every = snapshot_every
+        self._read_size = 0  # Log bytes reflected in the dicts
+        self._written = 0  # Log bytes this object appended
+        self._events_since_snapshot = 0
+        self.file = None
+        self._restore()
+
+    # Function to rebuild the dicts from the latest snapshot plus the log after it, and open the log for appending
+    def _restore(self):
+        with self.lock:
+            self.players.clear()
+            self.in_id_order = True
+            self.team_budgets.clear()
+        self._read_size = 0
+        snapshot = self._read_snapshot()
+        if snapshot is not None:
+            with self.lock:
+                self.players.update((row[0], dict(zip(PLAYER_COLUMNS, row), version=0)) for row in snapshot["players"])
+                self.team_budgets.update(snapshot["team_budgets"])
+                self.next_id = max(self.next_id, snapshot["next_id"])
+            self._read_size = snapshot["log_size"]
+        self._events_since_snapshot = 0
+        self._replay_tail()
+        if self.file is None:
+            self.file = open(self.path, "ab")
+            self.file.truncate(self._read_size)
+        # A long tail (an older log, or one written with snapshots further apart) is snapshotted straight away
+        if self._events_since_snapshot >= self.snapshot_every:
+            self.write_snapshot()
+
+    # Function to read the snapshot file; returns None if there is none or it doesn't fit the log
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = json.load(f)
+            log_size = os.path.getsize(self.path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return snapshot if snapshot["log_size"] <= log_size else None
+
+    # Function to apply the log's complete lines after the part already in the dicts
+    def _replay_tail(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._read_size)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        complete = data[:data.rfind(b"\n") + 1]  # Drop a torn final write
+        lines = complete.splitlines()
+        self._apply_events(json.loads(line) for line in lines)
+        self._read_size += len(complete)
+        self._events_since_snapshot += len(lines)
+
+    @timed_db_call
+    def load(self):
+        # Pick up lines another writer appended since this object last read or wrote the log;
+        # if the log shrank it was replaced, so start again from the snapshot
+        appended = self._unread_bytes()
+        if appended > 0:
+            self._replay_tail()
+        elif appended < 0:
+            self._restore()
+        return super().load()
+
+    # Bytes in the log that this object didn't write or replay (0 when nothing else has appended)
+    def _unread_bytes(self):
+        try:
+            return os.path.getsize(self.path) - self._read_size
+        except FileNotFoundError:
+            return -self._read_size
+
+    # The log's size less what this object appended: moves only when another writer appends
+    # (or the log is replaced), whether or not this object has replayed it yet
+    def data_version(self):
+        try:
+            return os.path.getsize(self.path) - self._written
+        except FileNotFoundError:
+            return None
+
+    def _commit(self, event):
+        line = (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+        self.file.write(line)
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self._read_size += len(line)
+        self._written += len(line)
+        self._apply_events((event,))
+        self._events_since_snapshot += 1
+        if self._events_since_snapshot >= self.snapshot_every:
+            self.write_snapshot()
+
+    # Function to write the current state as the snapshot. It is written to a temporary file and
+    # renamed over the old one, so a crash leaves either the old snapshot or the new one, whole.
+    def write_snapshot(self):
+        with self.lock:
+            snapshot = {
+                "log_size": self._read_size,
+                "next_id": self.next_id,
+                "team_budgets": dict(self.team_budgets),
+                "players": [[player[column] for column in PLAYER_COLUMNS] for player in self.players_in_order()],
+            }
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, separators=(",", ":")))  # dumps encodes in C; dump writes piece by piece
+            if self.sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+        self._events_since_snapshot = 0
+
+    def close(self):
+        self.file.close()
+
+
+# Export server rows straight from a MemoryStorage (or AppendOnlyFileStorage)
+class MemoryExportSource:
+    def __init__(self, storage):
+        self.storage = storage
+
+    def etag(self):
+        if isinstance(self.storage, AppendOnlyFileStorage):
+            return files_etag([self.storage.path])
+        return f'"{self.storage.changes:x}"'
+
+    def _state(self):
+        with self.storage.lock:
+            return self.storage.players_in_order(), dict(self.storage.team_budgets)
+
+    def players(self):
+        players, _ = self._state()
+        return (tuple(player[column] for column in PLAYER_COLUMNS) for player in players)
+
+    def teams(self):
+        _, team_budgets = self._state()
+        return iter(team_budgets.items())
+
+    # Rows of (team, id, name, sold_amount, rating, category, nationality) ordered by team,
+    # as SQLiteExportSource.squads
+    def squads(self):
+        players, team_budgets = self._state()
+        squads = {team: [] for team in team_budgets}
+        for player in players:
+            if player["team_bought"] in squads:
+                squads[player["team_bought"]].append(player)
+        for team in sorted(squads):
+            if not squads[team]:
+                yield (team,) + (None,) * (len(SQUAD_FIELDS) - 1)
+            for player in squads[team]:
+                yield (team,) + tuple(player[field] for field in SQUAD_FIELDS[1:])
+
+
+# Function to convert a player dict into plain JSON-friendly values (no numpy scalars)
+def _plain_player(player):
+    return {
+        "id": int(player["id"]),
+        "name": str(player["name"]),
+        "sold_amount": int(player["sold_amount"]),
+        "rating": int(player["rating"]),
+        "team_bought": str(player["team_bought"]),
+        "category": str(player["category"]),
+        "nationality": str(player["nationality"]),
+    }
+
+def _plain_changes(budget_changes):
+    return {str(team): int(change) for team, change in budget_changes.items()}
+
+# Function to open the named backend ("sqlite", "file" or "memory") at its default location
+def open_storage(backend="sqlite"):
+    if backend == "sqlite":
+        return SQLiteStorage(init_db(DB_PATH))
+    if backend == "file":
+        return AppendOnlyFileStorage(EVENT_LOG_PATH)
+    if backend == "memory":
+        return MemoryStorage(DEFAULT_TEAM_BUDGETS)
+    raise ValueError(f"Unknown storage backend '{backend}' (expected sqlite, file or memory).")
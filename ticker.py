@@ -0,0 +1,33 @@
+# Ticker (Section 0 slider) markup.
+#
+# Only the distinct sold-player items are sent to the browser. The old strip
+# repeated them until it had 250 entries so the text would keep scrolling;
+# the CSS animation already loops forever, so instead the animation duration
+# is scaled to the number of items to keep the same scrolling speed.
+
+SEPARATOR = "   🏏   "
+
+# Seconds each item takes to scroll past: the old strip moved 250 items in 1800s
+SECONDS_PER_ITEM = 1800 / 250
+
+# Function to build one ticker item per sold player
+def build_slider_items(snapshot):
+    slider_items = []
+    for team, squad in snapshot.team_squads.items():
+        total_team_rating = snapshot.team_stats[team].total_rating
+        for player in squad.sorted_values():
+            nationality = "✈️" if player["nationality"] == "Foreign" else ""
+            slider_items.append(f"{player['name']} {nationality} ({player['rating']}) | {team} ({total_team_rating})")
+    return slider_items
+
+# Function to build the slider markup for a list of ticker items
+def build_slider_html(slider_items):
+    # If there are no players, show a default message
+    content = SEPARATOR.join(slider_items) if slider_items else "No players have been bought yet."
+    duration = max(len(slider_items), 1) * SECONDS_PER_ITEM
+    return (
+        '<div class="slider-container">'
+        f'<div class="slider-content" style="animation-duration: {duration:g}s">'
+        f'<div class="slider-item">{content}</div>'
+        "</div></div>"
+    )